@@ -1,17 +1,34 @@
 # -*- coding: utf-8 -*-
+import argparse
+import hashlib
+import codecs
+import gzip
+import json
 import os
+import random
 import re
 import shutil
+import sys
 import tempfile
 import time
+import xml.etree.ElementTree as ET
+import zipfile
 from datetime import datetime
 from pathlib import Path
 import pandas as pd
 import unicodedata
 
-# COM (Word/Outlook)
-import win32com.client as win32
-from win32com.client import constants as c
+import com_resilience
+import mail_archive
+import mail_index
+import mime_writer
+import snapshot_cache
+
+# COM (Word/Outlook); fehlt z.B. beim Replay unter Linux
+try:
+    import win32com.client as win32
+except Exception:  # pragma: no cover - kein pywin32
+    win32 = None
 
 # =========================
 # KONFIG (Pfad & Konto)
@@ -21,6 +38,25 @@ PATH_FEEDBACK_SB = r"C:\Users\AlexanderHaller\Unternehmenskompass GmbH\Unternehm
 PATH_OPOS_TEMPLATE = r"C:\Users\AlexanderHaller\Unternehmenskompass GmbH\Unternehmenskompass - CRM\LTME\Automation\Offene Bankbewegungen.docx"
 PATH_EXCEL = r"C:\Users\AlexanderHaller\Unternehmenskompass GmbH\Unternehmenskompass - CRM\LTME\LTME Working.xlsm"
 FEEDBACK_ROOT = r"C:\Users\AlexanderHaller\Unternehmenskompass GmbH\Unternehmenskompass - CRM\LTME"
+# Snapshot-Cache der Excel-Tabellen (liegt neben der Arbeitsmappe)
+PATH_SNAPSHOT_DIR = os.path.join(os.path.dirname(PATH_EXCEL), ".ltme_snapshot")
+# Archiv aller erzeugten Mails (inhaltsadressiert, komprimiert)
+PATH_MAIL_ARCHIVE = os.path.join(os.path.dirname(PATH_EXCEL), ".ltme_archive")
+# Volltextindex der erzeugten Mails (Suche: python mail_index.py "<Begriff>" --db <Pfad>)
+PATH_MAIL_INDEX = os.path.join(os.path.dirname(PATH_EXCEL), ".ltme_index.sqlite")
+# Vorab gerenderte Entwürfe aus dem Watch-Modus ("Mail LTME.py" --watch)
+PATH_PRERENDER_DIR = os.path.join(os.path.dirname(PATH_EXCEL), ".ltme_prerender")
+WATCH_INTERVAL_SECONDS = 30
+# Aufzeichnungen für Replay ("Mail LTME.py" --record / --replay <Datei>)
+PATH_RECORDINGS_DIR = os.path.join(os.path.dirname(PATH_EXCEL), ".ltme_recordings")
+# Ausgabeweg: "outlook" (Entwürfe-Ordner) oder "eml" (.eml-Dateien, ohne Outlook)
+MAIL_SINK = "outlook"
+PATH_EML_OUTPUT = os.path.join(os.path.dirname(PATH_EXCEL), "Entwürfe (eml)")
+
+# Diese Mandanten zuerst bearbeiten (zusätzlich per --prio 10010,10020)
+PRIORITY_MANDANTEN: list[str] = []
+# Wartezeit vor dem Schließen des Konsolenfensters (0 = sofort; --no-pause)
+CLOSE_DELAY_SECONDS = 30
 
 SHEET_NAME = "Vorlage Mail"
 SMTP_INFO = "info@ltme-consulting.de"
@@ -36,6 +72,13 @@ COL_ZAHLLAST = 7
 COL_FLAG_FEEDBACK = 8
 COL_FLAG_USTVA = 9
 COL_FLAG_OPOS = 10
+# Statusspalte für das Rückschreiben nach dem Lauf (L; ggf. anpassen).
+# Geschrieben wird nur, wenn die Überschrift eine davon ist oder die Spalte leer ist.
+COL_STATUS = 11
+STATUS_HEADERS = {"status", "status mail", "mail-status"}
+# Erste Datenzeile in Excel (Zeile 1 = Überschriften, pandas-Index 0 = Excel-Zeile 2)
+EXCEL_FIRST_DATA_ROW = 2
+WRITEBACK_ENABLED = True
 
 # Für OPOS-Zeitraum-Erkennung in Dateinamen
 _MONTH_NAMES_DE = {
@@ -50,6 +93,13 @@ _MONTH_NAMES = [
 
 EURO = "\u20AC"
 
+# Word-Konstanten (wie win32com.client.constants)
+WD_REPLACE_ALL = 2
+WD_FORMAT_HTML = 8
+
+# Ersetzt win32.gencache.EnsureDispatch, z.B. durch Fake-Anwendungen im Replay
+COM_FACTORY = None
+
 # =========================
 # Hilfsfunktionen
 # =========================
@@ -182,6 +232,65 @@ def run_months_for_search_selftest() -> None:
         assert got == exp, f"{k} -> {got} != {exp}"
     print("[OK] months_for_search Selftest")
 
+# ---- Mehrere Zeiträume pro Zeile (Rückstände) ----
+_RANGE_SEP_RE = re.compile(r"\s*[\u2013\u2014-]\s*|\s+bis\s+", flags=re.IGNORECASE)
+_LIST_SEP_RE = re.compile(r"\s*[,;]\s*")
+_MONTH_ABBR = ["Jan", "Feb", "Mar", "Apr", "Mai", "Jun", "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
+_QUARTER_ROMAN = ["I", "II", "III", "IV"]
+
+def expand_timeframes(tf) -> list:
+    """Zerlegt eine Zeitraum-Zelle in einzelne Addison-Zeiträume.
+
+    "Jan 25–Jun 25" -> 6 Monate, "I 2025 - II 2025" -> 2 Quartale,
+    "Jan 25, Mär 25" -> 2 Monate; Einzelwerte (auch Datumswerte) bleiben unverändert.
+    """
+
+    if not isinstance(tf, str):
+        return [tf]
+
+    out = []
+    for part in _LIST_SEP_RE.split(tf.strip()):
+        if not part:
+            continue
+        ends = _RANGE_SEP_RE.split(part)
+        if len(ends) != 2:
+            out.append(part)
+            continue
+        start, end = months_for_search(ends[0]), months_for_search(ends[1])
+        if not start or not end or len(start) != len(end) or start[0] > end[0]:
+            print(f"[WARN] Zeitraum-Bereich nicht erkannt: '{part}'")
+            out.append(part)
+            continue
+        step = len(start)  # 1 = Monate, 3 = Quartale
+        y, m = map(int, start[0].split("-"))
+        end_y, end_m = map(int, end[0].split("-"))
+        while (y, m) <= (end_y, end_m):
+            if step == 1:
+                out.append(f"{_MONTH_ABBR[m - 1]} {y}")
+            else:
+                out.append(f"{_QUARTER_ROMAN[(m - 1) // 3]} {y}")
+            m += step
+            if m > 12:
+                m -= 12
+                y += 1
+    return out or [tf]
+
+
+def run_expand_timeframes_selftest() -> None:
+    """Regressionstests für Zeitraum-Bereiche und -Listen."""
+
+    cases = {
+        "Jan 25": ["Jan 25"],
+        "Jan 25\u2013Mär 25": ["Jan 2025", "Feb 2025", "Mar 2025"],
+        "Nov 24 - Feb 25": ["Nov 2024", "Dez 2024", "Jan 2025", "Feb 2025"],
+        "III 2024 bis I 2025": ["III 2024", "IV 2024", "I 2025"],
+        "Jan 25, Apr 25": ["Jan 25", "Apr 25"],
+    }
+    for k, exp in cases.items():
+        got = expand_timeframes(k)
+        assert got == exp, f"{k} -> {got} != {exp}"
+    print("[OK] expand_timeframes Selftest")
+
 def display_timeframe(tf: str) -> str:
     keys = months_for_search(tf)
     if not keys:
@@ -265,17 +374,55 @@ def normalize_mandant(v) -> str:
     return m.group(1) if m else s
 
 
+# Einmaliger Scan von FEEDBACK_ROOT pro Lauf (Mandantenordner + Dateilisten),
+# damit mehrere Zeiträume je Mandant nicht jedes Mal neu listen
+_MANDANT_FOLDERS: dict[str, str] | None = None
+_FOLDER_LISTINGS: dict[str, list[str]] = {}
+
+
+def reset_folder_scan() -> None:
+    global _MANDANT_FOLDERS
+    _MANDANT_FOLDERS = None
+    _FOLDER_LISTINGS.clear()
+
+
+def list_folder(folder: str) -> list[str]:
+    names = _FOLDER_LISTINGS.get(folder)
+    if names is None:
+        names = _FOLDER_LISTINGS[folder] = os.listdir(folder)
+    return names
+
+
+# Ordner -> (Listing, {kleingeschriebener Name: Name}); gilt, solange das Listing dasselbe ist
+_FOLDER_CASEFOLD: dict[str, tuple[list[str], dict[str, str]]] = {}
+
+
+def find_in_folder(folder: str, fname: str) -> str | None:
+    """Pfad zu fname im Ordner, Groß-/Kleinschreibung egal (wie os.path.isfile unter Windows)."""
+
+    names = list_folder(folder)
+    cached = _FOLDER_CASEFOLD.get(folder)
+    if cached is None or cached[0] is not names:
+        cached = _FOLDER_CASEFOLD[folder] = (names, {n.casefold(): n for n in names})
+    real = cached[1].get(fname.casefold())
+    return os.path.join(folder, real) if real is not None else None
+
+
 def find_mandant_folder(mandant: str) -> str | None:
     """Sucht Mandantenordner im FEEDBACK_ROOT; gibt Pfad oder None zurück."""
 
+    global _MANDANT_FOLDERS
     mandant = normalize_mandant(mandant)
-    for name in os.listdir(FEEDBACK_ROOT):
-        m = re.match(r"^(\d+)", name.strip())
-        if m and m.group(1) == mandant:
-            p = os.path.join(FEEDBACK_ROOT, name)
-            if os.path.isdir(p):
-                return p
-    return None
+    if _MANDANT_FOLDERS is None:
+        folders: dict[str, str] = {}
+        for name in os.listdir(FEEDBACK_ROOT):
+            m = re.match(r"^(\d+)", name.strip())
+            if m and m.group(1) not in folders:
+                p = os.path.join(FEEDBACK_ROOT, name)
+                if os.path.isdir(p):
+                    folders[m.group(1)] = p
+        _MANDANT_FOLDERS = folders
+    return _MANDANT_FOLDERS.get(mandant)
 
 
 def opos_period_to_months(text: str) -> set[str]:
@@ -329,9 +476,9 @@ def build_feedback_block(mandant: str, timeframe: str) -> str:
     out = []
     for key in keys:
         fname = f"Feedback FiBu {key}.txt"
-        fpath = os.path.join(base, fname)
-        if os.path.isfile(fpath):
-            print(f"[HIT] {fname}")
+        fpath = find_in_folder(base, fname)
+        if fpath and os.path.isfile(fpath):
+            print(f"[HIT] {os.path.basename(fpath)}")
             content = read_text_utf8(fpath)
             html_list = build_nested_feedback_html(content)
             header = html_encode(format_feedback_header(key))
@@ -344,12 +491,52 @@ def build_feedback_block(mandant: str, timeframe: str) -> str:
         return f'<div style="font-size:11pt;">{"".join(out)}</div>'
     return ""
 
+# =========================
+# Snapshot-Cache (Excel)
+# =========================
+def load_sheet_cached(excel_path: str, sheet_name: str, verbose: bool = True) -> pd.DataFrame:
+    """Lädt ein Tabellenblatt aus dem Snapshot, solange sich die Arbeitsmappe nicht geändert hat."""
+
+    return snapshot_cache.load_cached(
+        excel_path, PATH_SNAPSHOT_DIR, sheet_name,
+        lambda: pd.read_excel(excel_path, sheet_name=sheet_name, header=0),
+        verbose=verbose,
+    )
+
 # =========================
 # Word → HTML (UTF-8)
 # =========================
+# Geöffnete Vorlagen bleiben für den ganzen Lauf offen: (Pfad, Größe:mtime) -> Document
+_TEMPLATE_DOCS: dict[tuple[str, str], object] = {}
+
+
+def open_template(word_app, template_path: str):
+    key = (template_path, _stat_key(template_path))
+    tpl = _TEMPLATE_DOCS.get(key)
+    if tpl is None:
+        # Geänderte Vorlage (Watch-Modus): alte Fassung schließen
+        for old_key in [k for k in _TEMPLATE_DOCS if k[0] == template_path]:
+            try:
+                _TEMPLATE_DOCS.pop(old_key).Close(False)
+            except Exception:
+                pass
+        tpl = word_app.Documents.Open(FileName=template_path, ReadOnly=True)
+        _TEMPLATE_DOCS[key] = tpl
+    return tpl
+
+
+def close_templates() -> None:
+    for tpl in _TEMPLATE_DOCS.values():
+        try:
+            tpl.Close(False)
+        except Exception:
+            pass
+    _TEMPLATE_DOCS.clear()
+
+
 def word_fill_to_html(word_app, template_path: str, placeholders: dict, tmpdir: str) -> str:
-    # Vorlage öffnen und in neues Doc übernehmen
-    tpl = word_app.Documents.Open(FileName=template_path, ReadOnly=True)
+    # Vorlage (einmal geöffnet) in neues Doc übernehmen
+    tpl = open_template(word_app, template_path)
     doc = word_app.Documents.Add()
     doc.Content.FormattedText = tpl.Content.FormattedText
 
@@ -358,33 +545,21 @@ def word_fill_to_html(word_app, template_path: str, placeholders: dict, tmpdir:
     find.ClearFormatting()
     find.Replacement.ClearFormatting()
     for ph, val in placeholders.items():
-        find.Execute(FindText=ph, ReplaceWith=val, Replace=c.wdReplaceAll)
+        find.Execute(FindText=ph, ReplaceWith=val, Replace=WD_REPLACE_ALL)
 
     # HTML (nicht gefiltert!) + UTF-8 + PNG erlauben
     out_html = os.path.join(tmpdir, f"mail_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.htm")
     doc.WebOptions.Encoding = 65001        # UTF-8
     doc.WebOptions.AllowPNG = True         # bessere Grafikqualität
     # WICHTIG: Voll-HTML behalten, damit Styles drin bleiben
-    doc.SaveAs2(FileName=out_html, FileFormat=c.wdFormatHTML)  # = 8
+    doc.SaveAs2(FileName=out_html, FileFormat=WD_FORMAT_HTML)
 
-    tpl.Close(False)
     doc.Close(False)
     return out_html
 
 # =========================
 # Outlook Helpers
 # =========================
-def get_account(ns, smtp: str):
-    target = smtp.strip().lower()
-    for ac in ns.Accounts:
-        try:
-            if str(ac.SmtpAddress).strip().lower() == target:
-                return ac
-        except Exception:
-            pass
-    return None
-
-
 def create_draft_mail(outlook_app, account, email: str, subject: str, html: str, drafts_folder) -> None:
     """Erzeugt einen HTML-Entwurf und verschiebt ihn in den Drafts-Ordner."""
 
@@ -398,6 +573,44 @@ def create_draft_mail(outlook_app, account, email: str, subject: str, html: str,
     mail.Move(drafts_folder)
 
 
+def period_search_text(zeitraum) -> str:
+    """Suchbare Zeitraum-Tokens, z.B. "2025-04 2025-05 2025-06 2. Quartal 2025 Q2 2025"."""
+
+    keys = months_for_search(zeitraum)
+    tokens = list(keys)
+    tokens.append(str(display_timeframe(zeitraum)))
+    for q in sorted({(int(k[5:7]) - 1) // 3 + 1 for k in keys}):
+        tokens.append(f"Q{q}")
+    tokens.extend(sorted({k[:4] for k in keys}))
+    return " ".join(tokens)
+
+
+def record_generated_mail(mandant: str, zeitraum, mail_type: str, email: str, subject: str,
+                          html: str, attachments: list[str] | None = None,
+                          feedback_html: str = "") -> None:
+    """Archiviert und indiziert die erzeugte Mail; Fehler hier stoppen den Lauf nicht."""
+
+    meta = {
+        "mandant": mandant,
+        "period": months_for_search(zeitraum),
+        "type": mail_type,
+    }
+    try:
+        mail_archive.archive_mail(PATH_MAIL_ARCHIVE, meta, email, subject, html,
+                                  [Path(p) for p in attachments or []])
+    except Exception as e:
+        print(f"[WARN] Mail konnte nicht archiviert werden ({mandant}, {subject}): {e}")
+    try:
+        mail_index.index_mail(
+            PATH_MAIL_INDEX, mandant, period_search_text(zeitraum), mail_type, subject,
+            content=mail_index.html_to_text(feedback_html),
+            attachments=[os.path.basename(p) for p in attachments or []],
+            recipient=email,
+        )
+    except Exception as e:
+        print(f"[WARN] Mail konnte nicht indiziert werden ({mandant}, {subject}): {e}")
+
+
 def rename_sent_suffix(path: str, ts: str) -> None:
     """Hängt _sent_<ts> vor die .png-Endung (Firefox-Suffixe bleiben erhalten)."""
 
@@ -406,16 +619,12 @@ def rename_sent_suffix(path: str, ts: str) -> None:
     new_path = p.with_name(new_name)
     os.rename(p, new_path)
 
-def main():
-    # Vorab: Pfade prüfen
-    for p in (PATH_USTVA_BWA, PATH_FEEDBACK_SB, PATH_OPOS_TEMPLATE, PATH_EXCEL, FEEDBACK_ROOT):
-        if not os.path.exists(p):
-            raise FileNotFoundError(f"Pfad nicht gefunden: {p}")
-
-    run_months_for_search_selftest()
-
+# =========================
+# Jobs (Zeile → Entwürfe)
+# =========================
+def load_mail_table(verbose: bool = True) -> pd.DataFrame:
     # Excel laden
-    df = pd.read_excel(PATH_EXCEL, sheet_name=SHEET_NAME, header=0)
+    df = load_sheet_cached(PATH_EXCEL, SHEET_NAME, verbose=verbose)
 
     # Mandantenspalte-Name holen
     COL_MANDANT_NAME = df.columns[COL_MANDANT]
@@ -426,166 +635,765 @@ def main():
     # Spalte endgültig auf Text umstellen, dann normalisieren
     df[COL_MANDANT_NAME] = df[COL_MANDANT_NAME].astype('string')
     df[COL_MANDANT_NAME] = df[COL_MANDANT_NAME].map(normalize_mandant).astype('string')
+    return df
+
+
+def read_jobs(df: pd.DataFrame) -> list[dict]:
+    """Ein Job pro Zeile mit mindestens einem gesetzten Flag (Feedback/UStVA/OPOS)."""
+
+    jobs = []
+    for idx, row in df.iterrows():
+        # Sichtbarkeitslogik aus Excel (falls nötig): hier ignoriert — wir nehmen alle nichtleeren
+        has_feedback = to_bool(row.iloc[COL_FLAG_FEEDBACK])
+        has_ustva    = to_bool(row.iloc[COL_FLAG_USTVA])
+        has_opos     = to_bool(row.iloc[COL_FLAG_OPOS])
+        if not (has_feedback or has_ustva or has_opos):
+            continue
+
+        raw_zeitraum = row.iloc[COL_ZEITRAUM]
+        zeitraum = "" if pd.isna(raw_zeitraum) else raw_zeitraum
+        # Rückstände: "Jan 25–Jun 25" ergibt einen Job pro Monat
+        periods = expand_timeframes(zeitraum)
+        ustva = has_ustva
+        if has_ustva and len(periods) > 1:
+            # Die Zeile hat nur eine Zahllast -> keine UStVA/BWA-Mails je Teilzeitraum
+            print(
+                f"[WARN] Zeile {int(idx) + EXCEL_FIRST_DATA_ROW}: UStVA/BWA für mehrere Zeiträume "
+                f"('{zeitraum}') wird nicht aufgeteilt; bitte je Zeitraum eine Zeile anlegen"
+            )
+            ustva = False
+            if not (has_feedback or has_opos):
+                continue
+        for period in periods:
+            jobs.append({
+                "row": int(idx),
+                "mandant": row.iloc[COL_MANDANT],  # bereits normalisiert -> '10010'
+                "typ": str(row.iloc[COL_TYP]).strip().upper() if not pd.isna(row.iloc[COL_TYP]) else "",
+                "intervall": "" if pd.isna(row.iloc[COL_INTERVALL]) else str(row.iloc[COL_INTERVALL]),
+                "vorname": "" if pd.isna(row.iloc[COL_VORNAME]) else str(row.iloc[COL_VORNAME]),
+                "email": "" if pd.isna(row.iloc[COL_EMAIL]) else str(row.iloc[COL_EMAIL]),
+                "zeitraum": period,
+                "zahllast": format_zahllast(row.iloc[COL_ZAHLLAST]),
+                "feedback": has_feedback,
+                "ustva": ustva,
+                "opos": has_opos,
+            })
+    return jobs
+
+
+def find_opos_pngs(mandant: str, zeitraum) -> list[str]:
+    """Sucht die zum Zeitraum passenden OPOS-PNGs im Mandantenordner (keine Unterordner)."""
+
+    mail_months = set(months_for_search(zeitraum))
+    if not mail_months:
+        print(f"[WARN] Zeitraum für OPOS nicht erkannt: '{zeitraum}'")
+        return []
+    folder = find_mandant_folder(mandant)
+    if not folder:
+        print(f"[WARN] Mandantenordner nicht gefunden für Mandant {mandant}")
+        return []
+
+    opos_pngs: list[str] = []
+    candidates = [p for p in list_folder(folder) if p.lower().endswith(".png")]
+    for fname in candidates:
+        if "_sent_" in fname.lower():
+            continue
+        # Zeitraum-Teil aus Dateiname extrahieren: Segment vor evtl. " (n)" / "_sent" / ".png"
+        stem = Path(fname).stem
+        stem = re.sub(r"\s*\(\d+\)$", "", stem)  # Firefox-Suffix entfernen
+        stem = re.sub(r"_sent.*$", "", stem, flags=re.IGNORECASE)
+        period = stem.rsplit("_", 1)[-1] if "_" in stem else stem
+        png_months = opos_period_to_months(period)
+        if not png_months:
+            print(f"[WARN] Zeitraum im Dateinamen nicht erkannt: '{fname}'")
+            continue
+        if png_months.issubset(mail_months):
+            opos_pngs.append(os.path.join(folder, fname))
+
+    if not opos_pngs:
+        print(f"[WARN] Keine passenden PNGs für OPOS gefunden (Mandant {mandant}, Zeitraum {display_timeframe(zeitraum)})")
+    return opos_pngs
+
+
+# Cache für PNG-Inhaltshashes: (Pfad, Größe, mtime) -> Hash
+_PNG_HASH_CACHE: dict[tuple[str, int, int], str] = {}
+
+
+def _png_content_hash(path: str) -> str:
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    digest = _PNG_HASH_CACHE.get(key)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _PNG_HASH_CACHE[key] = digest
+    return digest
+
+
+def dedupe_opos_pngs(paths: list[str]) -> tuple[list[str], dict[str, list[str]]]:
+    """Mehrfach heruntergeladene Screenshots (" (1)", " (2)" …) nur einmal anhängen.
+
+    Erst nach Größe gruppieren, nur bei gleicher Größe den Inhalt hashen.
+    Liefert (eindeutige Pfade, {behaltener Pfad: [Duplikate]}).
+    """
+
+    by_size: dict[int, list[str]] = {}
+    for p in paths:
+        by_size.setdefault(os.path.getsize(p), []).append(p)
+
+    duplicates: dict[str, list[str]] = {}
+    drop: set[str] = set()
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+        seen: dict[str, str] = {}
+        # Kürzester Name zuerst → Datei ohne Firefox-Suffix bleibt erhalten
+        for p in sorted(group, key=lambda x: (len(os.path.basename(x)), x)):
+            digest = _png_content_hash(p)
+            if digest in seen:
+                duplicates.setdefault(seen[digest], []).append(p)
+                drop.add(p)
+            else:
+                seen[digest] = p
+
+    unique = [p for p in paths if p not in drop]
+    if drop:
+        print(f"[INFO] {format_count(len(drop), 'doppelter Screenshot', 'doppelte Screenshots')} nicht erneut angehängt")
+    return unique, duplicates
+
+
+def compose_job(word, job: dict, tmpdir: str) -> list[dict]:
+    """Rendert alle Entwürfe eines Jobs (ohne Outlook); Ergebnis ist JSON-serialisierbar."""
+
+    mandant = job["mandant"]
+    zeitraum = job["zeitraum"]
+    placeholders = {
+        "{{Vorname}}": job["vorname"],
+        "{{Email}}": job["email"],
+        "{{Zeitraum}}": display_timeframe(zeitraum),
+        "{{Zahllast}}": job["zahllast"],
+        "{{UStVA-Intervall}}": job["intervall"],
+        "{{Feedback}}": "{{Feedback}}"
+    }
+    drafts = []
+
+    # -----------------------
+    # FEEDBACK
+    # -----------------------
+    if job["feedback"]:
+        html_path = word_fill_to_html(word, PATH_FEEDBACK_SB, placeholders, tmpdir)
+        html = read_text_utf8(html_path)
+        block = build_feedback_block(mandant, zeitraum)
+        html = html.replace("{{Feedback}}", block)
+        html = ensure_utf8_meta(html)
+        drafts.append({
+            "kind": "feedback",
+            "subject": f"Feedback Finanzbuchhaltung f\u00FCr {display_timeframe(zeitraum)}",
+            "html": html,
+            "attachments": [],
+            "feedback_html": block,
+        })
+
+    # -----------------------
+    # USTVA/BWA
+    # -----------------------
+    if job["ustva"]:
+        html_path = word_fill_to_html(word, PATH_USTVA_BWA, placeholders, tmpdir)
+        html = read_text_utf8(html_path)
+        html = html.replace("{{Feedback}}", "")  # falls Platzhalter existiert
+        html = ensure_utf8_meta(html)
+        drafts.append({
+            "kind": "ustva",
+            "subject": f"UStVA- und BWA-Ergebnis f\u00FCr {display_timeframe(zeitraum)}",
+            "html": html,
+            "attachments": [],
+            "feedback_html": "",
+        })
+
+    # -----------------------
+    # OPOS (Entwurf mit PNG-Anhängen, kein Versand)
+    # -----------------------
+    if job["opos"]:
+        opos_pngs, duplicates = dedupe_opos_pngs(find_opos_pngs(mandant, zeitraum))
+        if opos_pngs:
+            html_path = word_fill_to_html(word, PATH_OPOS_TEMPLATE, placeholders, tmpdir)
+            html = read_text_utf8(html_path)
+            html = ensure_utf8_meta(html)
+            drafts.append({
+                "kind": "opos",
+                "subject": f"Offene Bankbewegungen f\u00FCr {display_timeframe(zeitraum)}",
+                "html": html,
+                "attachments": opos_pngs,
+                "duplicates": duplicates,
+                "feedback_html": "",
+            })
+
+    return drafts
+
+
+def push_draft(outlook, acct, drafts_folder, job: dict, draft: dict) -> int | None:
+    """Legt einen fertigen Entwurf im Ausgabeweg ab. Liefert die Zahl der Anhänge oder None."""
+
+    mandant = job["mandant"]
+    zeitraum = job["zeitraum"]
+    email = job["email"]
+    if MAIL_SINK == "eml":
+        # Anhänge werden beim Schreiben gestreamt, nie komplett im Speicher kodiert
+        attachments = [Path(p) for p in draft["attachments"]]
+        mime_writer.write_eml(PATH_EML_OUTPUT, SMTP_INFO, email, draft["subject"], draft["html"], attachments)
+        record_generated_mail(mandant, zeitraum, draft["kind"], email, draft["subject"], draft["html"],
+                              [str(p) for p in attachments], feedback_html=draft["feedback_html"])
+        mark_opos_sent(attachments, draft.get("duplicates", {}))
+        return len(attachments)
+
+    if not draft["attachments"]:
+        create_draft_mail(outlook, acct, email, draft["subject"], draft["html"], drafts_folder)
+        record_generated_mail(mandant, zeitraum, draft["kind"], email, draft["subject"], draft["html"],
+                              feedback_html=draft["feedback_html"])
+        return 0
+
+    mail = outlook.CreateItem(0)
+    mail.BodyFormat = 2
+    mail.HTMLBody = draft["html"]
+    mail.To = email
+    mail.Subject = draft["subject"]
+    mail.SendUsingAccount = acct
+
+    attached_success: list[Path] = []
+    for fpath in draft["attachments"]:
+        try:
+            mail.Attachments.Add(fpath)
+            attached_success.append(Path(fpath))
+        except Exception:
+            print(f"[WARN] Fehler beim Anhängen von '{os.path.basename(fpath)}' an OPOS-Mail für Mandant {mandant}")
+
+    if not attached_success:
+        print(f"[WARN] Keine Anhänge für OPOS übernommen (Mandant {mandant}, Zeitraum {display_timeframe(zeitraum)})")
+        return None
+
+    mail.Save()
+    mail.Move(drafts_folder)
+    # Archivieren, solange die PNGs noch ihren ursprünglichen Namen haben
+    record_generated_mail(mandant, zeitraum, draft["kind"], email, draft["subject"], draft["html"],
+                          [str(p) for p in attached_success])
+
+    mark_opos_sent(attached_success, draft.get("duplicates", {}))
+    return len(attached_success)
+
+
+def mark_opos_sent(attached: list[Path], duplicates: dict[str, list[str]]) -> None:
+    """Benennt angehängte PNGs und ihre Duplikate mit _sent_<ts> um."""
+
+    if not attached:
+        return
+    to_rename = list(attached)
+    for p in attached:
+        to_rename.extend(Path(d) for d in duplicates.get(str(p), []))
+
+    sent_ts = datetime.now().strftime("%Y%m%d%H%M%S")
+    for p in to_rename:
+        try:
+            rename_sent_suffix(str(p), sent_ts)
+        except Exception:
+            print(f"[WARN] Fehler beim Umbenennen von '{p.name}'")
+    # Ordnerinhalt hat sich geändert -> beim nächsten Job neu listen
+    _FOLDER_LISTINGS.clear()
+
+
+# =========================
+# Status-Rückschreiben (xlsm ohne Excel)
+# =========================
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_ROW_RE = re.compile(r"<row\b[^>]*/>|<row\b[^>]*>.*?</row>", flags=re.S)
+_ROW_NUM_RE = re.compile(r'\br="(\d+)"')
+_CELL_RE = re.compile(r'<c\b[^>]*?\br="([A-Z]+)\d+"[^>]*?(?:/>|>.*?</c>)', flags=re.S)
+_STYLE_RE = re.compile(r'\bs="(\d+)"')
+
+
+def col_letter(idx: int) -> str:
+    """0-basierter Spaltenindex -> Excel-Buchstabe (8 -> 'I')."""
+
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _col_number(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def _xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _build_cell(ref: str, style: str | None, value) -> str:
+    s_attr = f' s="{style}"' if style else ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s_attr} t="b"><v>{int(value)}</v></c>'
+    return f'<c r="{ref}"{s_attr} t="inlineStr"><is><t xml:space="preserve">{_xml_escape(str(value))}</t></is></c>'
+
+
+def _apply_row_edits(row_xml: str, row_num: int, edits: dict[str, object]) -> str:
+    """Setzt Zellwerte in einer <row>; Formelzellen bleiben unangetastet."""
+
+    if row_xml.endswith("/>"):
+        row_xml = row_xml[:-2] + "></row>"
+    open_end = row_xml.index(">") + 1
+    head, body, tail = row_xml[:open_end], row_xml[open_end:-len("</row>")], "</row>"
+
+    cells = [(m.group(1), m.group(0)) for m in _CELL_RE.finditer(body)]
+    existing = {col: xml for col, xml in cells}
+    for col, value in edits.items():
+        old = existing.get(col)
+        if old is not None and ("<f>" in old or "<f " in old):
+            print(f"[WARN] {col}{row_num} enthält eine Formel und wird nicht überschrieben")
+            continue
+        style = None
+        if old is not None:
+            m = _STYLE_RE.search(old.split(">", 1)[0])
+            style = m.group(1) if m else None
+        existing[col] = _build_cell(f"{col}{row_num}", style, value)
+
+    # Zellen müssen in Spaltenreihenfolge stehen
+    ordered = sorted(existing.items(), key=lambda kv: _col_number(kv[0]))
+    rest = _CELL_RE.sub("", body)  # z.B. <extLst> o.ä. außerhalb der Zellen
+    return head + "".join(xml for _, xml in ordered) + rest + tail
+
+
+def _sheet_member(zf: zipfile.ZipFile, sheet_name: str) -> str:
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    rid = None
+    for sheet in wb.iter(f"{_NS_MAIN}sheet"):
+        if sheet.get("name") == sheet_name:
+            rid = sheet.get(f"{_NS_REL}id")
+            break
+    if rid is None:
+        raise KeyError(f"Tabellenblatt '{sheet_name}' nicht in der Arbeitsmappe")
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{_NS_PKG_REL}Relationship"):
+        if rel.get("Id") == rid:
+            target = rel.get("Target")
+            return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    raise KeyError(f"Blatt-XML für '{sheet_name}' nicht gefunden")
+
+
+def write_back_status(excel_path: str, sheet_name: str, edits: dict[int, dict[str, object]]) -> int:
+    """Schreibt Zellwerte direkt in das Blatt-XML der .xlsm, ohne Excel zu starten.
+
+    edits: {Excel-Zeile: {Spaltenbuchstabe: Wert}}; bool -> WAHR/FALSCH, sonst Text.
+    Nur das betroffene Blatt wird zeilenweise umgeschrieben, alle anderen Teile
+    (Makros, Styles, Tabellen) werden unverändert übernommen.
+    """
+
+    if not edits:
+        return 0
+    tmp_path = excel_path + ".writeback.tmp"
+    changed = 0
+    try:
+        with zipfile.ZipFile(excel_path, "r") as zin, zipfile.ZipFile(tmp_path, "w") as zout:
+            member = _sheet_member(zin, sheet_name)
+            for info in zin.infolist():
+                with zin.open(info) as src, zout.open(info, "w") as dst:
+                    if info.filename != member:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+                        continue
+
+                    decoder = codecs.getincrementaldecoder("utf-8")()
+                    buf = ""
+                    while True:
+                        chunk = src.read(1024 * 1024)
+                        buf += decoder.decode(chunk, final=not chunk)
+                        # Nur vollständige Zeilen verarbeiten, Rest im Puffer behalten
+                        cut = buf.rfind("</row>")
+                        if cut >= 0 or not chunk:
+                            cut = len(buf) if not chunk else cut + len("</row>")
+                            done, buf = buf[:cut], buf[cut:]
+
+                            def _repl(m):
+                                nonlocal changed
+                                num = _ROW_NUM_RE.search(m.group(0).split(">", 1)[0])
+                                row_num = int(num.group(1)) if num else -1
+                                if row_num not in edits:
+                                    return m.group(0)
+                                changed += 1
+                                return _apply_row_edits(m.group(0), row_num, edits[row_num])
+
+                            dst.write(_ROW_RE.sub(_repl, done).encode("utf-8"))
+                        if not chunk:
+                            break
+    except BaseException:
+        # Keine halbe Kopie neben der Arbeitsmappe im synchronisierten Ordner liegen lassen
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if changed:
+        os.replace(tmp_path, excel_path)
+    else:
+        os.remove(tmp_path)
+    return changed
+
+
+def status_column_usable(df: pd.DataFrame) -> bool:
+    """Prüft, ob COL_STATUS eine Statusspalte (oder leer) ist, damit keine Notizen überschrieben werden."""
+
+    if COL_STATUS >= len(df.columns):
+        return True
+    header = str(df.columns[COL_STATUS]).strip()
+    if header.lower() in STATUS_HEADERS:
+        return True
+    if header.startswith("Unnamed:"):
+        # Ohne Überschrift: nur leere Zellen oder eigener Status aus früheren Läufen
+        values = df.iloc[:, COL_STATUS].dropna().astype(str).str.strip()
+        if values.map(lambda v: not v or v.startswith(("Entwurf:", "Kein Entwurf"))).all():
+            return True
+    print(f"[WARN] Spalte {col_letter(COL_STATUS)} ('{header}') ist keine Statusspalte; Status wird nicht geschrieben")
+    return False
+
+
+def build_status_edits(results: list[tuple[dict, list[str]]],
+                       write_status: bool = True) -> dict[int, dict[str, object]]:
+    """Erledigte Flags auf FALSCH, Status + Zeitstempel in COL_STATUS (falls write_status)."""
+
+    flag_cols = {
+        "feedback": col_letter(COL_FLAG_FEEDBACK),
+        "ustva": col_letter(COL_FLAG_USTVA),
+        "opos": col_letter(COL_FLAG_OPOS),
+    }
+    labels = {"feedback": "Feedback", "ustva": "UStVA/BWA", "opos": "OPOS"}
+    stamp = datetime.now().strftime("%d.%m.%Y %H:%M")
+
+    # Mehrere Zeiträume je Zeile zusammenfassen: Flag nur zurücksetzen,
+    # wenn die Entwurfsart für jeden Zeitraum der Zeile erstellt wurde
+    per_row: dict[int, list[list[str]]] = {}
+    for job, kinds in results:
+        per_row.setdefault(job["row"], []).append(kinds)
+
+    edits: dict[int, dict[str, object]] = {}
+    for row, runs in per_row.items():
+        counts = {k: sum(k in kinds for kinds in runs) for k in labels}
+        row_edits: dict[str, object] = {flag_cols[k]: False for k, n in counts.items() if n == len(runs)}
+        done = [
+            labels[k] if len(runs) == 1 else f"{labels[k]} {n}/{len(runs)}"
+            for k, n in counts.items() if n
+        ]
+        if write_status:
+            row_edits[col_letter(COL_STATUS)] = (
+                f"Entwurf: {', '.join(done)} ({stamp})" if done else f"Kein Entwurf erstellt ({stamp})"
+            )
+        if row_edits:
+            edits[row + EXCEL_FIRST_DATA_ROW] = row_edits
+    return edits
+
+
+# =========================
+# Vorab-Rendering (Watch-Modus)
+# =========================
+def _stat_key(path: str) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "-"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
 
+def job_fingerprint(job: dict) -> str:
+    """Hash über alle Eingaben eines Jobs: Zeile, Vorlagen, Feedback-Dateien, PNGs im Mandantenordner."""
 
-    # COM-Apps
-    word = win32.gencache.EnsureDispatch("Word.Application")
+    parts = [json.dumps({k: str(v) for k, v in job.items()}, sort_keys=True)]
+    for tpl in (PATH_FEEDBACK_SB, PATH_USTVA_BWA, PATH_OPOS_TEMPLATE):
+        parts.append(f"{tpl}|{_stat_key(tpl)}")
+    folder = find_mandant_folder(job["mandant"])
+    if folder:
+        if job["feedback"]:
+            for key in months_for_search(job["zeitraum"]):
+                fpath = find_in_folder(folder, f"Feedback FiBu {key}.txt")
+                parts.append(f"{fpath or key}|{_stat_key(fpath) if fpath else '-'}")
+        if job["opos"]:
+            for name in sorted(list_folder(folder)):
+                if name.lower().endswith(".png"):
+                    parts.append(f"{name}|{_stat_key(os.path.join(folder, name))}")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _prerender_path(fingerprint: str) -> str:
+    return os.path.join(PATH_PRERENDER_DIR, f"{fingerprint}.json")
+
+
+def store_prerendered(fingerprint: str, drafts: list[dict]) -> None:
+    os.makedirs(PATH_PRERENDER_DIR, exist_ok=True)
+    path = _prerender_path(fingerprint)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(drafts, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def load_prerendered(fingerprint: str) -> list[dict] | None:
+    try:
+        with open(_prerender_path(fingerprint), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[WARN] Vorab-Entwurf unlesbar, wird neu erstellt: {e}")
+        return None
+
+
+def drop_prerendered(fingerprint: str) -> None:
+    try:
+        os.remove(_prerender_path(fingerprint))
+    except FileNotFoundError:
+        pass
+
+
+def watch_and_prerender() -> None:
+    """Beobachtet Arbeitsmappe und Mandantenordner (Polling) und rendert betroffene Entwürfe vorab.
+
+    Der eigentliche Lauf (main) übernimmt passende Vorab-Entwürfe und muss sie nur
+    noch in Outlook ablegen; ändert sich eine Eingabe, ändert sich der Fingerprint.
+    """
+
+    com_resilience.install_message_filter()
+    word = dispatch_app("Word.Application")
     word.Visible = False
-    outlook = win32.gencache.EnsureDispatch("Outlook.Application")
-    ns = outlook.GetNamespace("MAPI")
+    tmpdir = tempfile.mkdtemp(prefix="ltme_watch_")
+    print(f"[INFO] Watch-Modus aktiv (alle {WATCH_INTERVAL_SECONDS} s, Strg+C beendet)")
+    try:
+        while True:
+            reset_folder_scan()
+            try:
+                jobs = read_jobs(load_mail_table(verbose=False))
+            except Exception as e:
+                # z.B. Arbeitsmappe gerade in Excel gesperrt
+                print(f"[WARN] Arbeitsmappe nicht lesbar, nächster Versuch folgt: {e}")
+                time.sleep(WATCH_INTERVAL_SECONDS)
+                continue
 
-    acct = get_account(ns, SMTP_INFO)
-    if acct is None:
-        raise RuntimeError(f"Outlook-Konto '{SMTP_INFO}' nicht gefunden.")
-    drafts = acct.DeliveryStore.GetDefaultFolder(16)  # olFolderDrafts
+            current = set()
+            failed = False
+            for job in jobs:
+                # Ein fehlerhafter Job (Word-Fehler, Ordner kurz weg beim Sync, PNG umbenannt)
+                # darf den Watcher nicht beenden; nächster Versuch beim nächsten Durchlauf
+                try:
+                    fp = job_fingerprint(job)
+                    current.add(fp)
+                    if os.path.isfile(_prerender_path(fp)):
+                        continue
+                    print(f"[PRE] Mandant {job['mandant']} ({display_timeframe(job['zeitraum'])}) wird vorbereitet")
+                    store_prerendered(fp, compose_job(word, job, tmpdir))
+                except Exception as e:
+                    failed = True
+                    print(f"[WARN] Vorab-Rendering für Mandant {job['mandant']} fehlgeschlagen: {e}")
+
+            # Veraltete Vorab-Entwürfe (Eingaben geändert, Flag entfernt) entsorgen;
+            # nach Fehlern nicht, da dann nicht alle gültigen Fingerprints bekannt sind
+            if not failed and os.path.isdir(PATH_PRERENDER_DIR):
+                try:
+                    for name in os.listdir(PATH_PRERENDER_DIR):
+                        if name.endswith(".json") and name[:-5] not in current:
+                            drop_prerendered(name[:-5])
+                except OSError as e:
+                    print(f"[WARN] Vorab-Entwürfe konnten nicht aufgeräumt werden: {e}")
+
+            time.sleep(WATCH_INTERVAL_SECONDS)
+    except KeyboardInterrupt:
+        print("[INFO] Watch-Modus beendet.")
+    finally:
+        close_templates()
+        try:
+            word.Quit(SaveChanges=False)
+        except Exception:
+            pass
+        shutil.rmtree(tmpdir, ignore_errors=True)
 
-    tmpdir = tempfile.mkdtemp(prefix="ltme_")
+
+# =========================
+# Reihenfolge & Fortschritt
+# =========================
+def estimate_job(job: dict, prerendered: bool) -> tuple[bool, int]:
+    """Schätzt (bereit, Kosten) eines Jobs ohne Word/Outlook.
+
+    bereit = Feedback-Datei bzw. OPOS-PNGs liegen im Mandantenordner; Kosten grob in
+    Word-Renderings plus Anhängen. Vorab gerenderte Jobs brauchen nur noch Outlook.
+    """
+
+    if prerendered:
+        return True, 1
+    folder = find_mandant_folder(job["mandant"])
+    names = list_folder(folder) if folder else []
+    ready = True
+    cost = 1
+    if job["feedback"]:
+        cost += 2
+        keys = months_for_search(job["zeitraum"])
+        ready = ready and folder is not None and any(
+            find_in_folder(folder, f"Feedback FiBu {key}.txt") for key in keys
+        )
+    if job["ustva"]:
+        cost += 2
+    if job["opos"]:
+        pngs = [n for n in names if n.lower().endswith(".png") and "_sent_" not in n.lower()]
+        ready = ready and bool(pngs)
+        cost += 2 + len(pngs)
+    return ready, cost
+
+
+def schedule_jobs(jobs: list[dict], priority: set[str]) -> list[dict]:
+    """Ordnet die Jobs so, dass die ersten Entwürfe nach Sekunden vorliegen.
+
+    Reihenfolge: priorisierte Mandanten, dann bereite vor unvollständigen Jobs,
+    innerhalb davon günstige (vorab gerendert, ohne Anhänge) zuerst; sonst Tabellenreihenfolge.
+    """
+
+    plan = []
+    for index, job in enumerate(jobs):
+        fp = job_fingerprint(job)
+        ready, cost = estimate_job(job, os.path.exists(_prerender_path(fp)))
+        plan.append({"index": index, "job": job, "fp": fp, "ready": ready, "cost": cost})
+    plan.sort(key=lambda e: (e["job"]["mandant"] not in priority, not e["ready"], e["cost"], e["index"]))
+    return plan
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d} h"
+    return f"{seconds // 60}:{seconds % 60:02d} min"
+
+
+class ProgressLine:
+    """Fortschrittszeile: erledigte Jobs, Durchsatz und geschätzte Restzeit.
+
+    Im Konsolenfenster wird die Zeile überschrieben; bei umgeleiteter Ausgabe
+    erscheint nur jede zehnte Meldung.
+    """
+
+    def __init__(self, total_jobs: int, total_cost: int):
+        self.total_jobs = total_jobs
+        self.total_cost = max(total_cost, 1)
+        self.done_jobs = 0
+        self.done_cost = 0
+        self.drafts = 0
+        self.start = time.perf_counter()
+        self.first_draft: float | None = None
+        self.live = sys.stdout.isatty()
+
+    def clear(self) -> None:
+        """Vor weiteren Ausgaben aufrufen, damit Warnungen nicht in der Zeile landen."""
+
+        if self.live:
+            print("\r\033[K", end="", flush=True)
+
+    def draft_done(self) -> None:
+        self.drafts += 1
+        if self.first_draft is None:
+            self.first_draft = time.perf_counter() - self.start
+            print(f"[INFO] Erster Entwurf nach {self.first_draft:.1f} s")
+
+    def job_done(self, cost: int) -> None:
+        self.done_jobs += 1
+        self.done_cost += cost
+        elapsed = time.perf_counter() - self.start
+        rate = self.drafts / elapsed * 60 if elapsed else 0.0
+        # Restzeit nach geschätzten Kosten, da günstige Jobs vorne stehen
+        remaining = (self.total_cost - self.done_cost) * elapsed / max(self.done_cost, 1)
+        text = (
+            f"[{self.done_jobs}/{self.total_jobs}] "
+            f"{format_count(self.drafts, 'Entwurf', 'Entwürfe')}, {rate:.0f}/min, "
+            f"Rest ca. {format_duration(max(remaining, 0.0))}"
+        )
+        if self.live:
+            print(f"\r\033[K{text}", end="", flush=True)
+        elif self.done_jobs % 10 == 0 or self.done_jobs == self.total_jobs:
+            print(text)
+
+    def finish(self) -> None:
+        self.clear()
+        elapsed = time.perf_counter() - self.start
+        first = f", erster Entwurf nach {self.first_draft:.1f} s" if self.first_draft is not None else ""
+        print(f"[INFO] {format_count(self.done_jobs, 'Job', 'Jobs')} in {format_duration(elapsed)}{first}")
+
+
+def dispatch_app(progid: str):
+    """Startet eine COM-Anwendung (bzw. deren Fake) und umhüllt sie mit dem Retry-Proxy."""
+
+    app = COM_FACTORY(progid) if COM_FACTORY is not None else win32.gencache.EnsureDispatch(progid)
+    return com_resilience.wrap(app, progid.split(".")[0])
+
+
+def run_batch(jobs: list[dict], outlook, acct, drafts, tmpdir: str,
+              results: list[tuple[dict, list[str]]], priority: set[str] | None = None) -> None:
+    """Erstellt alle Entwürfe der Jobs; results wird laufend ergänzt (auch bei Abbruch)."""
+
+    if priority is None:
+        priority = {normalize_mandant(m) for m in PRIORITY_MANDANTEN}
+    plan = schedule_jobs(jobs, priority)
+    progress = ProgressLine(len(plan), sum(e["cost"] for e in plan))
+
+    # Word nur starten, wenn nicht alles vorab gerendert ist
+    word = None
 
     count_fb = 0
     count_u = 0
     count_opos = 0
+    count_pre = 0
     summary_lines = []
-    summary_lines_opos = []
 
     try:
-        for idx, row in df.iterrows():
-            # Sichtbarkeitslogik aus Excel (falls nötig): hier ignoriert — wir nehmen alle nichtleeren
-            mandant = row.iloc[COL_MANDANT]  # bereits normalisiert -> '10010'
-            typ       = str(row.iloc[COL_TYP]).strip().upper() if not pd.isna(row.iloc[COL_TYP]) else ""
-            intervall = "" if pd.isna(row.iloc[COL_INTERVALL]) else str(row.iloc[COL_INTERVALL])
-            vorname   = "" if pd.isna(row.iloc[COL_VORNAME]) else str(row.iloc[COL_VORNAME])
-            email     = "" if pd.isna(row.iloc[COL_EMAIL]) else str(row.iloc[COL_EMAIL])
-            raw_zeitraum = row.iloc[COL_ZEITRAUM]
-            zeitraum = "" if pd.isna(raw_zeitraum) else raw_zeitraum
-            # zeitraum  = "" if pd.isna(row.iloc[COL_ZEITRAUM]) else str(row.iloc[COL_ZEITRAUM])
-            zahllast  = format_zahllast(row.iloc[COL_ZAHLLAST])
-            did_fb = False
-            did_ust = False
-            did_opos = False
-            opos_attach_count = 0
-            opos_pngs: list[str] = []
-
-            has_feedback = to_bool(row.iloc[COL_FLAG_FEEDBACK])
-            has_ustva    = to_bool(row.iloc[COL_FLAG_USTVA])
-            has_opos     = to_bool(row.iloc[COL_FLAG_OPOS])
-            if not (has_feedback or has_ustva or has_opos):
-                continue
+        for entry in plan:
+            job = entry["job"]
+            mandant = job["mandant"]
+            zeitraum = job["zeitraum"]
+            progress.clear()
+
+            fp = entry["fp"]
+            job_drafts = load_prerendered(fp)
+            if job_drafts is None:
+                if word is None:
+                    word = dispatch_app("Word.Application")
+                    word.Visible = False
+                job_drafts = compose_job(word, job, tmpdir)
+            else:
+                count_pre += 1
 
-            # Platzhalter
-            placeholders = {
-                "{{Vorname}}": vorname,
-                "{{Email}}": email,
-                "{{Zeitraum}}": display_timeframe(zeitraum),
-                "{{Zahllast}}": zahllast,
-                "{{UStVA-Intervall}}": intervall,
-                "{{Feedback}}": "{{Feedback}}"
-            }
-
-            # -----------------------
-            # FEEDBACK
-            # -----------------------
-            if has_feedback:
-                html_path = word_fill_to_html(word, PATH_FEEDBACK_SB, placeholders, tmpdir)
-                html = read_text_utf8(html_path)
-                block = build_feedback_block(mandant, zeitraum)
-                html = html.replace("{{Feedback}}", block)
-                html = ensure_utf8_meta(html)
-                subject = f"Feedback Finanzbuchhaltung f\u00FCr {display_timeframe(zeitraum)}"
-                create_draft_mail(outlook, acct, email, subject, html, drafts)
-                did_fb = True
-                count_fb += 1
-
-            # -----------------------
-            # USTVA/BWA
-            # -----------------------
-            if has_ustva:
-                html_path = word_fill_to_html(word, PATH_USTVA_BWA, placeholders, tmpdir)
-                html = read_text_utf8(html_path)
-                html = html.replace("{{Feedback}}", "")  # falls Platzhalter existiert
-                html = ensure_utf8_meta(html)
-                subject = f"UStVA- und BWA-Ergebnis f\u00FCr {display_timeframe(zeitraum)}"
-                create_draft_mail(outlook, acct, email, subject, html, drafts)
-                did_ust = True
-                count_u += 1
-
-            # -----------------------
-            # OPOS (Grundgerüst, kein Mailversand)
-            # -----------------------
-            if has_opos:
-                mail_months = set(months_for_search(zeitraum))
-                if not mail_months:
-                    print(f"[WARN] Zeitraum für OPOS nicht erkannt: '{zeitraum}'")
+            parts = []
+            kinds_done = []
+            for draft in job_drafts:
+                attached = push_draft(outlook, acct, drafts, job, draft)
+                if attached is None:
+                    continue
+                progress.draft_done()
+                kinds_done.append(draft["kind"])
+                if draft["kind"] == "feedback":
+                    count_fb += 1
+                    parts.append("Feedback")
+                elif draft["kind"] == "ustva":
+                    count_u += 1
+                    parts.append("UStVA/BWA")
                 else:
-                    folder = find_mandant_folder(mandant)
-                    if not folder:
-                        print(f"[WARN] Mandantenordner nicht gefunden für Mandant {mandant}")
-                    else:
-                        # PNGs im Mandantenordner sammeln (keine Unterordner)
-                        candidates = [p for p in os.listdir(folder) if p.lower().endswith(".png")]
-                        for fname in candidates:
-                            if "_sent_" in fname.lower():
-                                continue
-                            # Zeitraum-Teil aus Dateiname extrahieren: Segment vor evtl. " (n)" / "_sent" / ".png"
-                            stem = Path(fname).stem
-                            stem = re.sub(r"\s*\(\d+\)$", "", stem)  # Firefox-Suffix entfernen
-                            stem = re.sub(r"_sent.*$", "", stem, flags=re.IGNORECASE)
-                            period = stem.rsplit("_", 1)[-1] if "_" in stem else stem
-                            png_months = opos_period_to_months(period)
-                            if not png_months:
-                                print(f"[WARN] Zeitraum im Dateinamen nicht erkannt: '{fname}'")
-                                continue
-                            if png_months.issubset(mail_months):
-                                opos_pngs.append(os.path.join(folder, fname))
-
-                        if opos_pngs:
-                            # OPOS-Mail erstellen (ohne Versand)
-                            html_path = word_fill_to_html(word, PATH_OPOS_TEMPLATE, placeholders, tmpdir)
-                            html = read_text_utf8(html_path)
-                            html = ensure_utf8_meta(html)
-
-                            mail = outlook.CreateItem(0)
-                            mail.BodyFormat = 2
-                            mail.HTMLBody = html
-                            mail.To = email
-                            mail.Subject = f"Offene Bankbewegungen f\u00FCr {display_timeframe(zeitraum)}"
-                            mail.SendUsingAccount = acct
-
-                            attached_success: list[Path] = []
-                            for fpath in opos_pngs:
-                                try:
-                                    mail.Attachments.Add(fpath)
-                                    attached_success.append(Path(fpath))
-                                except Exception:
-                                    print(f"[WARN] Fehler beim Anhängen von '{os.path.basename(fpath)}' an OPOS-Mail für Mandant {mandant}")
-
-                            if attached_success:
-                                mail.Save()
-                                mail.Move(drafts)
-
-                                sent_ts = datetime.now().strftime("%Y%m%d%H%M%S")
-                                for p in attached_success:
-                                    try:
-                                        rename_sent_suffix(str(p), sent_ts)
-                                    except Exception:
-                                        print(f"[WARN] Fehler beim Umbenennen von '{p.name}'")
-
-                                did_opos = True
-                                count_opos += 1
-                                opos_attach_count = len(attached_success)
-                            else:
-                                print(f"[WARN] Keine Anhänge für OPOS übernommen (Mandant {mandant}, Zeitraum {display_timeframe(zeitraum)})")
-                        else:
-                            print(f"[WARN] Keine passenden PNGs für OPOS gefunden (Mandant {mandant}, Zeitraum {display_timeframe(zeitraum)})")
+                    count_opos += 1
+                    parts.append(f"OPOS mit {format_count(attached, 'Anhang', 'Anhänge')}")
+            drop_prerendered(fp)
+            results.append((job, kinds_done))
+            progress.job_done(entry["cost"])
 
-            parts = []
-            if did_fb:
-                parts.append("Feedback")
-            if did_ust:
-                parts.append("UStVA/BWA")
-            if did_opos:
-                parts.append(f"OPOS mit {format_count(opos_attach_count, 'Anhang', 'Anhänge')}")
             if parts:
-                summary_lines.append(f"- Für Mandant {mandant} im Zeitraum {display_timeframe(zeitraum)}: {', '.join(parts)}")
+                summary_lines.append((entry["index"], f"- Für Mandant {mandant} im Zeitraum {display_timeframe(zeitraum)}: {', '.join(parts)}"))
+
+        progress.finish()
 
         # ANSI-Codes für Unterstreichung
         UNDERLINE = "\033[4m"
@@ -596,27 +1404,297 @@ def main():
             format_count(count_opos, "OPOS-Mail", "OPOS-Mails"),
         ])
         print(f"\n{UNDERLINE}Erstellt: {summary_counts}:{RESET}")
-        for line in summary_lines:
+        # Zusammenfassung wieder in Tabellenreihenfolge
+        for _, line in sorted(summary_lines):
             print(line)
+        if count_pre:
+            print(f"[INFO] {format_count(count_pre, 'Job', 'Jobs')} aus Vorab-Rendering übernommen")
+        print(f"[INFO] {com_resilience.STATS.summary()}")
         print()
 
+    finally:
+        progress.clear()
+        close_templates()
+        if word is not None:
+            try:
+                word.Quit(SaveChanges=False)
+            except Exception:
+                pass
+
+
+# =========================
+# Aufzeichnen & Abspielen (Replay)
+# =========================
+_FEEDBACK_FILE_RE = re.compile(r"Feedback FiBu \d{4}-\d{2}\.txt", flags=re.IGNORECASE)
+_SENT_PART_RE = re.compile(r"_sent", flags=re.IGNORECASE)
+
+
+def _period_token(zeitraum) -> str:
+    """Datumswerte aus Excel als "Jan 2025" speichern, damit das Bundle reines JSON bleibt."""
+
+    if isinstance(zeitraum, str):
+        return zeitraum
+    keys = months_for_search(zeitraum)
+    if len(keys) == 1:
+        y, m = keys[0].split("-")
+        return f"{_MONTH_ABBR[int(m) - 1]} {y}"
+    return str(zeitraum)
+
+
+def _anonymize_png_name(name: str, index: int) -> str:
+    """Ersetzt den Namensteil vor dem Zeitraum; Zeitraum, " (n)" und _sent_ bleiben erhalten.
+
+    Nur ein erkannter OPOS-Zeitraum wird übernommen, alle anderen PNGs heißen PNG<n>.
+    """
+
+    stem, ext = os.path.splitext(name)
+    m = _SENT_PART_RE.search(stem)
+    base, sent = (stem[:m.start()], stem[m.start():]) if m else (stem, "")
+    if sent and not re.fullmatch(r"_sent[_\d]*", sent, flags=re.IGNORECASE):
+        sent = "_sent"  # nur den Zeitstempel übernehmen, keinen sonstigen Text
+    period = base.rsplit("_", 1)[-1]
+    firefox = re.search(r"\s*\(\d+\)$", period)
+    if firefox:
+        period = period[:firefox.start()]
+    if not opos_period_to_months(period):
+        return f"PNG{index}{sent}{ext}"
+    return f"OPOS{index}_{period}{firefox.group(0) if firefox else ''}{sent}{ext}"
+
+
+def record_inputs(jobs: list[dict]) -> dict:
+    """Erfasst die Eingaben eines Laufs anonymisiert: keine Namen, Adressen, Beträge oder Texte.
+
+    Mandanten werden auf Kunstnummern (900001, …) abgebildet; von Feedback-Dateien
+    bleiben Größe und Zeilenzahl, von PNGs Größe und eine Duplikat-Gruppe.
+    """
+
+    aliases: dict[str, str] = {}
+    rec_jobs = []
+    for job in jobs:
+        alias = aliases.setdefault(job["mandant"], str(900001 + len(aliases)))
+        rec_jobs.append({
+            **job,
+            "mandant": alias,
+            "vorname": "Vorname",
+            "email": f"m{alias}@example.invalid",
+            "zahllast": format_zahllast(0),
+            "zeitraum": _period_token(job["zeitraum"]),
+        })
+
+    folders = {}
+    groups: dict[str, int] = {}
+    for mandant, alias in aliases.items():
+        folder = find_mandant_folder(mandant)
+        if not folder:
+            continue
+        files = []
+        for name in sorted(list_folder(folder)):
+            path = os.path.join(folder, name)
+            if not os.path.isfile(path):
+                continue
+            if _FEEDBACK_FILE_RE.fullmatch(name):
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    lines = sum(1 for _ in f)
+                files.append({"name": name, "size": os.path.getsize(path), "lines": lines})
+            elif name.lower().endswith(".png"):
+                group = groups.setdefault(_png_content_hash(path), len(groups))
+                files.append({
+                    "name": _anonymize_png_name(name, len(files)),
+                    "size": os.path.getsize(path),
+                    "group": group,
+                })
+        folders[alias] = {"name": f"{alias} Mandant", "files": files}
+
+    return {
+        "version": 1,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "jobs": rec_jobs,
+        "folders": folders,
+        "latency": {},
+    }
+
+
+def save_recording(bundle: dict) -> str:
+    bundle["latency"] = com_resilience.STATS.samples
+    os.makedirs(PATH_RECORDINGS_DIR, exist_ok=True)
+    path = os.path.join(PATH_RECORDINGS_DIR, f"run_{datetime.now():%Y%m%d_%H%M%S}.json.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(bundle, f)
+    return path
+
+
+def _fake_call_name(label: str) -> str:
+    """Proxy-Label (z.B. "Outlook.CreateItem.Attachments.Add") -> Name im FakeBackend."""
+
+    if label.startswith("set "):
+        # "set Outlook.CreateItem.HTMLBody" -> "set HTMLBody"
+        return "set " + label.rsplit(".", 1)[-1]
+    parts = label.split(".")
+    pair = ".".join(parts[-2:])
+    if pair in {"Attachments.Add", "Documents.Open", "Documents.Add", "Find.Execute"}:
+        return pair
+    return parts[-1]
+
+
+def replay_bundle(bundle_path: str) -> None:
+    """Spielt eine Aufzeichnung mit Fake-Word/Outlook und den aufgezeichneten Latenzen ab.
+
+    Baut einen synthetischen FEEDBACK_ROOT (gleiche Dateinamen und -größen) in einem
+    Temp-Ordner auf; Archiv, Index und Vorab-Entwürfe landen ebenfalls dort.
+    """
+
+    global FEEDBACK_ROOT, PATH_USTVA_BWA, PATH_FEEDBACK_SB, PATH_OPOS_TEMPLATE
+    global PATH_MAIL_ARCHIVE, PATH_MAIL_INDEX, PATH_PRERENDER_DIR, MAIL_SINK, COM_FACTORY
+    import fake_com
+
+    with gzip.open(bundle_path, "rt", encoding="utf-8") as f:
+        bundle = json.load(f)
+
+    root = tempfile.mkdtemp(prefix="ltme_replay_")
+    try:
+        FEEDBACK_ROOT = os.path.join(root, "LTME")
+        for folder in bundle["folders"].values():
+            base = os.path.join(FEEDBACK_ROOT, folder["name"])
+            os.makedirs(base, exist_ok=True)
+            for entry in folder["files"]:
+                if "group" in entry:
+                    # gleiche Gruppe -> gleicher Inhalt (Duplikate bleiben Duplikate)
+                    data = random.Random(entry["group"]).randbytes(entry["size"])
+                else:
+                    lines = max(entry["lines"], 1)
+                    line = "- " + "x" * max(entry["size"] // lines - 3, 1)
+                    data = "\n".join([line] * lines).encode("utf-8")
+                with open(os.path.join(base, entry["name"]), "wb") as f:
+                    f.write(data)
+
+        PATH_FEEDBACK_SB = os.path.join(root, "Feedback (Selbstbucher).docx")
+        PATH_USTVA_BWA = os.path.join(root, "UStVA + BWA (Mandanten).docx")
+        PATH_OPOS_TEMPLATE = os.path.join(root, "Offene Bankbewegungen.docx")
+        for tpl in (PATH_FEEDBACK_SB, PATH_USTVA_BWA, PATH_OPOS_TEMPLATE):
+            open(tpl, "wb").close()
+        PATH_MAIL_ARCHIVE = os.path.join(root, "archive")
+        PATH_MAIL_INDEX = os.path.join(root, "index.sqlite")
+        PATH_PRERENDER_DIR = os.path.join(root, "prerender")
+        MAIL_SINK = "outlook"
+
+        latency: dict[str, list[float]] = {}
+        for label, samples in bundle.get("latency", {}).items():
+            latency.setdefault(_fake_call_name(label), []).extend(samples)
+        backend = fake_com.FakeBackend(latency=latency)
+        COM_FACTORY = lambda progid: (  # noqa: E731
+            fake_com.FakeWord(backend) if progid.startswith("Word")
+            else fake_com.FakeOutlook(backend, accounts=[SMTP_INFO])
+        )
+
+        reset_folder_scan()
+        com_resilience.STATS.reset()
+        outlook = dispatch_app("Outlook.Application")
+        acct, drafts = com_resilience.outlook_drafts(outlook, SMTP_INFO)
+        tmpdir = os.path.join(root, "tmp")
+        os.makedirs(tmpdir)
+
+        jobs = bundle["jobs"]
+        results: list[tuple[dict, list[str]]] = []
+        start = time.perf_counter()
+        run_batch(jobs, outlook, acct, drafts, tmpdir, results)
+        elapsed = time.perf_counter() - start
+        n_drafts = sum(len(kinds) for _, kinds in results)
+        print(
+            f"[INFO] Replay: {format_count(len(jobs), 'Job', 'Jobs')}, "
+            f"{format_count(n_drafts, 'Entwurf', 'Entwürfe')} in {elapsed:.2f} s "
+            f"({n_drafts / elapsed if elapsed else 0:.1f} Entwürfe/s)"
+        )
+    finally:
+        COM_FACTORY = None
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(record: bool = False, priority: set[str] | None = None):
+    # Vorab: Pfade prüfen
+    for p in (PATH_USTVA_BWA, PATH_FEEDBACK_SB, PATH_OPOS_TEMPLATE, PATH_EXCEL, FEEDBACK_ROOT):
+        if not os.path.exists(p):
+            raise FileNotFoundError(f"Pfad nicht gefunden: {p}")
+
+    run_months_for_search_selftest()
+    run_expand_timeframes_selftest()
+    mail_archive.run_selftest()
+
+    df = load_mail_table()
+    jobs = read_jobs(df)
+    # Alle (Mandant, Zeitraum)-Jobs in einem Durchgang planen
+    mandanten = {job["mandant"] for job in jobs}
+    print(f"[INFO] Geplant: {format_count(len(jobs), 'Job', 'Jobs')} für {format_count(len(mandanten), 'Mandant', 'Mandanten')}")
+
+    # Eingaben vor dem Lauf festhalten (danach sind PNGs bereits umbenannt)
+    recording = record_inputs(jobs) if record else None
+    com_resilience.STATS.keep_samples = record
+
+    outlook = acct = drafts = None
+    # Alle COM-Aufrufe laufen über den Retry-Proxy ("Aufruf abgelehnt" während Outlook synchronisiert)
+    com_resilience.install_message_filter()
+    if MAIL_SINK == "outlook":
+        outlook = dispatch_app("Outlook.Application")
+        acct, drafts = com_resilience.outlook_drafts(outlook, SMTP_INFO)
+        if acct is None:
+            raise RuntimeError(f"Outlook-Konto '{SMTP_INFO}' nicht gefunden.")
+
+    tmpdir = tempfile.mkdtemp(prefix="ltme_")
+    results: list[tuple[dict, list[str]]] = []  # (Job, erstellte Entwurfsarten) fürs Rückschreiben
+
+    try:
+        run_batch(jobs, outlook, acct, drafts, tmpdir, results, priority)
     finally:
         # Aufräumen
-        try:
-            word.Quit(SaveChanges=False)
-        except Exception:
-            pass
         try:
             shutil.rmtree(tmpdir, ignore_errors=True)
         except Exception:
             pass
+        if recording is not None:
+            try:
+                print(f"[INFO] Aufzeichnung gespeichert: {save_recording(recording)}")
+            except Exception as e:
+                print(f"[WARN] Aufzeichnung konnte nicht gespeichert werden: {e}")
+        # Flags/Status zurückschreiben, bevor Excel die Datei wieder öffnet
+        if WRITEBACK_ENABLED and results:
+            try:
+                n = write_back_status(PATH_EXCEL, SHEET_NAME, build_status_edits(results, status_column_usable(df)))
+                print(f"[INFO] Status für {format_count(n, 'Zeile', 'Zeilen')} in '{SHEET_NAME}' zurückgeschrieben")
+            except Exception as e:
+                print(f"[WARN] Status konnte nicht in die Arbeitsmappe geschrieben werden: {e}")
         # Excel-Datei nach dem Durchlauf wieder öffnen
         try:
             os.startfile(PATH_EXCEL)  # öffnet die .xlsm mit Excel
         except Exception as e:
             print(f"[WARN] Excel konnte nicht geöffnet werden: {e}")
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mandanten-Mails (Feedback, UStVA/BWA, OPOS) als Entwürfe erstellen")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--watch", action="store_true", help="Eingaben beobachten und Entwürfe vorab rendern")
+    mode.add_argument("--replay", metavar="DATEI", help="Aufzeichnung (.json.gz) mit Fake-Word/Outlook abspielen")
+    parser.add_argument("--record", action="store_true", help="Eingaben des Laufs anonymisiert aufzeichnen")
+    parser.add_argument("--prio", metavar="MANDANTEN", default="",
+                        help="diese Mandanten zuerst bearbeiten, z.B. 10010,10020")
+    parser.add_argument("--no-pause", action="store_true", help="Fenster nach dem Lauf sofort schließen")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
-    print("[INFO] Fenster schließt sich selbst in 30 Sekunden...")
-    time.sleep(30)  # Zeit zum Lesen der Zusammenfassung
\ No newline at end of file
+    args = parse_args()
+    if args.watch:
+        watch_and_prerender()
+    elif args.replay:
+        replay_bundle(args.replay)
+    else:
+        priority = None
+        if args.prio:
+            priority = {normalize_mandant(m) for m in args.prio.split(",") if m.strip()}
+            priority |= {normalize_mandant(m) for m in PRIORITY_MANDANTEN}
+        main(record=args.record, priority=priority)
+        # Zeit zum Lesen der Zusammenfassung, nur in einem echten Konsolenfenster
+        if CLOSE_DELAY_SECONDS and not args.no_pause and sys.stdin is not None and sys.stdin.isatty():
+            print(f"[INFO] Fenster schließt sich selbst in {CLOSE_DELAY_SECONDS} Sekunden (Strg+C: sofort)...")
+            try:
+                time.sleep(CLOSE_DELAY_SECONDS)
+            except KeyboardInterrupt:
+                pass
@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import base64
+import hashlib
+import itertools
+import json
+import mimetypes
 import os
 import re
 import shutil
@@ -8,9 +13,15 @@ import sys
 import tempfile
 from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
 
+import com_resilience
+import mail_archive
+import mime_writer
+import snapshot_cache
+
 import win32com.client as win32
 from win32com.client import constants as c
 
@@ -30,6 +41,19 @@ PATH_RUNDMAIL_TEMPLATE = BASE_DIR / "Rundmail.docx"
 PATH_EXCEL = r"C:\Users\AlexanderHaller\Unternehmenskompass GmbH\Unternehmenskompass - CRM\LTME\LTME Working.xlsm"
 PATH_RUNDMAIL_ATTACHMENTS = Path(r"C:\Users\AlexanderHaller\Unternehmenskompass GmbH\Unternehmenskompass - CRM\LTME\Automation\Anhang Rundmail")
 PATH_RUNDMAIL_ARCHIVE = PATH_RUNDMAIL_ATTACHMENTS / "Archiv"
+# Snapshot-Cache der Excel-Tabellen (liegt neben der Arbeitsmappe, geteilt mit Mail LTME.py)
+PATH_SNAPSHOT_DIR = Path(PATH_EXCEL).parent / ".ltme_snapshot"
+# Warnschwelle für die Gesamtgröße aller Rundmail-Anhänge pro Mail
+RUNDMAIL_ATTACHMENT_BUDGET_BYTES = 20 * 1024 * 1024
+# Streaming-Modus für sehr große Verteiler (auch per Aufruf mit --stream aktivierbar)
+RUNDMAIL_STREAMING = False
+RUNDMAIL_CHECKPOINT_EVERY = 25
+PATH_RUNDMAIL_CHECKPOINT = PATH_SNAPSHOT_DIR / "rundmail_checkpoint.json"
+# Archiv aller erzeugten Mails (geteilt mit Mail LTME.py)
+PATH_MAIL_ARCHIVE = Path(PATH_EXCEL).parent / ".ltme_archive"
+# Ausgabeweg: "outlook" (Entwürfe-Ordner) oder "eml" (.eml-Dateien, ohne Outlook)
+RUNDMAIL_SINK = "outlook"
+PATH_RUNDMAIL_EML_OUTPUT = Path(PATH_EXCEL).parent / "Rundmail-Entwürfe (eml)"
 SMTP_INFO = "info@ltme-consulting.de"
 
 _SENT_FLAG_RE = re.compile(r"_sent_on_\d{4}_\d{2}_\d{2}($|_)", flags=re.IGNORECASE)
@@ -77,31 +101,35 @@ def pop_heading_text(doc) -> str | None:
     return None
 
 
-def collect_recipients(df: pd.DataFrame) -> list[dict[str, str]]:
-    recipients: list[dict[str, str]] = []
+def check_overview_columns(df: pd.DataFrame) -> None:
     max_idx = max(COL_MAILANS, COL_EMAIL, COL_FLAG_RUNDMAIL)
     if df.shape[1] <= max_idx:
         raise ValueError(
             f"Tabelle '{SHEET_NAME}' hat zu wenige Spalten (erwartet >= {max_idx + 1})."
         )
 
-    for _, row in df.iterrows():
-        if not to_bool_like(row.iloc[COL_FLAG_RUNDMAIL]):
+
+def iter_recipients(df: pd.DataFrame) -> Iterator[dict[str, str]]:
+    """Liefert die markierten Empfänger einzeln, ohne die Liste zu materialisieren."""
+
+    for row in df.itertuples(index=False, name=None):
+        if not to_bool_like(row[COL_FLAG_RUNDMAIL]):
             continue
 
-        email = row.iloc[COL_EMAIL]
+        email = row[COL_EMAIL]
         if pd.isna(email) or not str(email).strip():
             continue
 
-        mailansprache = row.iloc[COL_MAILANS]
-        recipients.append(
-            {
-                "email": str(email).strip(),
-                "mailansprache": "" if pd.isna(mailansprache) else str(mailansprache).strip(),
-            }
-        )
+        mailansprache = row[COL_MAILANS]
+        yield {
+            "email": str(email).strip(),
+            "mailansprache": "" if pd.isna(mailansprache) else str(mailansprache).strip(),
+        }
+
 
-    return recipients
+def collect_recipients(df: pd.DataFrame) -> list[dict[str, str]]:
+    check_overview_columns(df)
+    return list(iter_recipients(df))
 
 
 def gather_rundmail_attachments() -> tuple[list[Path], list[Path]]:
@@ -120,6 +148,57 @@ def gather_rundmail_attachments() -> tuple[list[Path], list[Path]]:
     return attachments, flagged
 
 
+class AttachmentPool:
+    """Liest und MIME-kodiert jeden Rundmail-Anhang genau einmal pro Lauf.
+
+    Outlook (COM) bekommt weiterhin den Dateipfad; der .eml-Ausgabeweg teilt sich
+    die einmal erzeugten base64-Bytes über alle Empfänger hinweg (mime_parts()).
+    """
+
+    def __init__(self, files: list[Path], budget_bytes: int = RUNDMAIL_ATTACHMENT_BUDGET_BYTES):
+        self.files: list[Path] = []
+        self.total_bytes = 0
+        self._encoded: dict[Path, tuple[str, bytes]] = {}
+        for path in files:
+            try:
+                size = path.stat().st_size
+            except OSError as exc:
+                print(f"[WARN] Rundmail-Anhang nicht lesbar, übersprungen: {path.name} ({exc})")
+                continue
+            self.files.append(path)
+            self.total_bytes += size
+        if self.total_bytes > budget_bytes:
+            print(
+                f"[WARN] Rundmail-Anhänge sind zusammen {self.total_bytes / 1024 / 1024:.1f} MB groß "
+                f"(Budget {budget_bytes / 1024 / 1024:.0f} MB) – Mails könnten abgelehnt werden."
+            )
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def paths(self) -> list[str]:
+        return [str(path) for path in self.files]
+
+    def encoded(self, path: Path) -> tuple[str, bytes]:
+        """Liefert (Content-Type, base64-Bytes mit CRLF-Zeilen à 76 Zeichen), einmalig berechnet."""
+
+        cached = self._encoded.get(path)
+        if cached is None:
+            ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            raw = base64.b64encode(path.read_bytes())
+            lines = [raw[i:i + 76] for i in range(0, len(raw), 76)]
+            cached = (ctype, b"\r\n".join(lines) + b"\r\n")
+            self._encoded[path] = cached
+        return cached
+
+    def mime_parts(self) -> list[mime_writer.EncodedPart]:
+        return [(path.name, *self.encoded(path)) for path in self.files]
+
+    def add_to_mail_item(self, mail_item) -> None:
+        for path in self.paths():
+            mail_item.Attachments.Add(path)
+
+
 def archive_attachments(files: list[Path], date_tag: str) -> None:
     if not files:
         return
@@ -148,7 +227,9 @@ def render_personalized_html(word_app, placeholders: dict[str, str], tmpdir: str
     for token, value in placeholders.items():
         finder.Execute(FindText=token, ReplaceWith=value, Replace=c.wdReplaceAll)
 
-    html_path = os.path.join(tmpdir, f"rundmail_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.htm")
+    # Eigener Unterordner pro Empfänger: Word legt daneben "<Name>_files" bzw. "<Name>-Dateien" an
+    render_dir = tempfile.mkdtemp(prefix="mail_", dir=tmpdir)
+    html_path = os.path.join(render_dir, "rundmail.htm")
     doc.WebOptions.Encoding = 65001
     doc.WebOptions.AllowPNG = True
     doc.SaveAs2(FileName=html_path, FileFormat=c.wdFormatHTML)
@@ -157,6 +238,8 @@ def render_personalized_html(word_app, placeholders: dict[str, str], tmpdir: str
     doc.Close(False)
 
     html = read_text_utf8(html_path)
+    # Word-Export samt Begleitordner sofort entsorgen, damit der Temp-Ordner nicht wächst
+    shutil.rmtree(render_dir, ignore_errors=True)
     return ensure_utf8_meta(html)
 
 
@@ -170,20 +253,6 @@ def extract_subject_from_template(word_app) -> str:
     return subject or "Rundmail"
 
 
-# =========================
-# Outlook Helpers
-# =========================
-def get_account(ns, smtp: str):
-    target = smtp.strip().lower()
-    for account in ns.Accounts:
-        try:
-            if str(account.SmtpAddress).strip().lower() == target:
-                return account
-        except Exception:  # pragma: no cover
-            pass
-    return None
-
-
 # =========================
 # Excel-Handling
 # =========================
@@ -221,11 +290,105 @@ def read_overview_table(excel_path: Path) -> pd.DataFrame:
     return df
 
 
+def load_overview_cached(excel_path: Path) -> pd.DataFrame:
+    """Wie read_overview_table, aber ohne Excel-Start, solange die Arbeitsmappe unverändert ist."""
+
+    return snapshot_cache.load_cached(
+        excel_path, PATH_SNAPSHOT_DIR, f"table_{TABLE_NAME}", lambda: read_overview_table(excel_path)
+    )
+
+
+# =========================
+# Checkpoints (Streaming-Modus)
+# =========================
+def run_signature(df: pd.DataFrame) -> str:
+    """Schlüssel für Checkpoints: geordnete Empfängerliste + mtime der Vorlage.
+
+    Bewusst nicht die .xlsm selbst: StartRundmail.vba speichert die Arbeitsmappe vor
+    jedem Start, dabei ändern sich Bytes, aber nicht die Empfänger.
+    """
+
+    digest = hashlib.sha1()
+    for recipient in iter_recipients(df):
+        digest.update(recipient["email"].lower().encode("utf-8") + b"\n")
+    digest.update(str(PATH_RUNDMAIL_TEMPLATE.stat().st_mtime_ns).encode("ascii"))
+    return digest.hexdigest()
+
+
+def load_checkpoint(signature: str) -> tuple[int, str]:
+    """(bereits erstellte Entwürfe, letzte Adresse) eines abgebrochenen Laufs; (0, "") ohne Treffer."""
+
+    try:
+        data = json.loads(PATH_RUNDMAIL_CHECKPOINT.read_text(encoding="utf-8"))
+    except Exception:
+        return 0, ""
+    if data.get("signature") != signature:
+        return 0, ""
+    return int(data.get("done", 0)), str(data.get("last_email", ""))
+
+
+def checkpoint_matches(df: pd.DataFrame, done: int, last_email: str) -> bool:
+    """Prüft, ob der Empfänger an Position `done` der zuletzt erstellte Entwurf war."""
+
+    recipient = next(itertools.islice(iter_recipients(df), done - 1, None), None)
+    return recipient is not None and recipient["email"].lower() == last_email.lower()
+
+
+def save_checkpoint(signature: str, done: int, last_email: str) -> None:
+    PATH_RUNDMAIL_CHECKPOINT.parent.mkdir(parents=True, exist_ok=True)
+    tmp = PATH_RUNDMAIL_CHECKPOINT.with_suffix(".json.tmp")
+    tmp.write_text(
+        json.dumps({"signature": signature, "done": done, "last_email": last_email}),
+        encoding="utf-8",
+    )
+    os.replace(tmp, PATH_RUNDMAIL_CHECKPOINT)
+
+
+def clear_checkpoint() -> None:
+    try:
+        PATH_RUNDMAIL_CHECKPOINT.unlink()
+    except FileNotFoundError:
+        pass
+
+
 # =========================
 # Hauptlogik (main)
 # =========================
+def create_rundmail_draft(
+    word_app, outlook_app, account, drafts, subject: str, pool: AttachmentPool,
+    recipient: dict[str, str], tmpdir: str,
+) -> None:
+    placeholders = {
+        "{{Mailansprache}}": recipient["mailansprache"],
+        "{{Vorname}}": recipient["mailansprache"],
+        "{{Email}}": recipient["email"],
+    }
+    html = render_personalized_html(word_app, placeholders, tmpdir)
+    if RUNDMAIL_SINK == "eml":
+        mime_writer.write_eml(
+            PATH_RUNDMAIL_EML_OUTPUT, SMTP_INFO, recipient["email"], subject, html, pool.mime_parts()
+        )
+    else:
+        mail_item = outlook_app.CreateItem(0)
+        mail_item.BodyFormat = 2
+        mail_item.HTMLBody = html
+        mail_item.To = recipient["email"]
+        mail_item.Subject = subject
+        mail_item.SendUsingAccount = account
+        pool.add_to_mail_item(mail_item)
+        mail_item.Save()
+        mail_item.Move(drafts)
+    try:
+        mail_archive.archive_mail(
+            PATH_MAIL_ARCHIVE, {"type": "rundmail"}, recipient["email"], subject, html, pool.files
+        )
+    except Exception as exc:
+        print(f"[WARN] Rundmail an {recipient['email']} konnte nicht archiviert werden: {exc}")
+
+
 def main() -> None:
     excel_path = Path(PATH_EXCEL)
+    streaming = RUNDMAIL_STREAMING or "--stream" in sys.argv[1:]
     # print(f"[INFO] Verwende fest codierten Excel-Pfad: {excel_path}")
 
     attachments, flagged = gather_rundmail_attachments()
@@ -246,7 +409,7 @@ def main() -> None:
         sys.exit(1)
 
     try:
-        df = read_overview_table(excel_path)
+        df = load_overview_cached(excel_path)
     except Exception as exc:  # pragma: no cover - Fehlermeldung
         print(f"[WARN] Tabellenbereich konnte nicht geladen werden: {exc}")
         sys.exit(1)
@@ -255,70 +418,100 @@ def main() -> None:
         print(f"[WARN] Tabelle '{SHEET_NAME}' enthält keine Zeilen.")
 
     try:
-        recipients = collect_recipients(df)
+        if streaming:
+            check_overview_columns(df)
+            recipients = iter_recipients(df)
+            # Ersten Empfänger vorziehen, um leere Läufe wie bisher früh zu beenden
+            first = next(recipients, None)
+            if first is not None:
+                recipients = itertools.chain([first], recipients)
+        else:
+            recipients = collect_recipients(df)
     except ValueError as exc:
         print(f"[WARN] {exc}")
         sys.exit(1)
 
-    count = len(recipients)
-    print()
-    print(f"[INFO] Gefilterte Rundmail-Empfänger: {count}")
-    for idx, entry in enumerate(recipients, start=1):
-        ansprache = entry["mailansprache"] or "<leer>"
-        print(f"{idx}. {entry['email']} – {ansprache}")
-    print()
-
-    if count == 0:
-        print("[INFO] Keine Rundmail-Entwürfe nötig. Script beendet.")
-        return
+    if streaming:
+        if first is None:
+            print("[INFO] Keine Rundmail-Entwürfe nötig. Script beendet.")
+            return
+        print("[INFO] Streaming-Modus: Empfänger werden einzeln verarbeitet.")
+    else:
+        count = len(recipients)
+        print()
+        print(f"[INFO] Gefilterte Rundmail-Empfänger: {count}")
+        for idx, entry in enumerate(recipients, start=1):
+            ansprache = entry["mailansprache"] or "<leer>"
+            print(f"{idx}. {entry['email']} – {ansprache}")
+        print()
+
+        if count == 0:
+            print("[INFO] Keine Rundmail-Entwürfe nötig. Script beendet.")
+            return
 
     if not PATH_RUNDMAIL_TEMPLATE.is_file():
         print(f"[WARN] Rundmail-Vorlage nicht gefunden: {PATH_RUNDMAIL_TEMPLATE}")
         sys.exit(1)
 
+    pool = AttachmentPool(attachments)
+
     word_app = None
     outlook_app = None
     tmpdir = tempfile.mkdtemp(prefix="rundmail_")
     created = 0
+    signature = ""
+    skip = 0
+    if streaming:
+        signature = run_signature(df)
+        skip, resume_email = load_checkpoint(signature)
+        if skip and not checkpoint_matches(df, skip, resume_email):
+            # Nicht raten: falsches Überspringen verliert Empfänger, Neustart erzeugt Duplikate
+            print(
+                f"[WARN] Checkpoint passt nicht: Entwurf {skip} war an '{resume_email}'. "
+                f"Bitte Entwürfe prüfen und ggf. {PATH_RUNDMAIL_CHECKPOINT} löschen."
+            )
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            sys.exit(1)
+        if skip:
+            print(f"[INFO] Setze abgebrochenen Lauf fort: {format_count(skip, 'Entwurf', 'Entwürfe')} bereits erstellt (zuletzt {resume_email}).")
+    last_email = ""
 
     try:
-        word_app = win32.gencache.EnsureDispatch("Word.Application")
+        # Alle COM-Aufrufe laufen über den Retry-Proxy ("Aufruf abgelehnt" während Outlook synchronisiert)
+        com_resilience.install_message_filter()
+        word_app = com_resilience.wrap(win32.gencache.EnsureDispatch("Word.Application"), "Word")
         word_app.Visible = False
         subject = extract_subject_from_template(word_app)
 
-        outlook_app = win32.gencache.EnsureDispatch("Outlook.Application")
-        namespace = outlook_app.GetNamespace("MAPI")
-        account = get_account(namespace, SMTP_INFO)
-        if account is None:
-            print(f"[WARN] Outlook-Account '{SMTP_INFO}' nicht gefunden.")
-            sys.exit(1)
-
-        drafts = account.DeliveryStore.GetDefaultFolder(16)
-
-        for recipient in recipients:
-            placeholders = {
-                "{{Mailansprache}}": recipient["mailansprache"],
-                "{{Vorname}}": recipient["mailansprache"],
-                "{{Email}}": recipient["email"],
-            }
-            html = render_personalized_html(word_app, placeholders, tmpdir)
-            mail_item = outlook_app.CreateItem(0)
-            mail_item.BodyFormat = 2
-            mail_item.HTMLBody = html
-            mail_item.To = recipient["email"]
-            mail_item.Subject = subject
-            mail_item.SendUsingAccount = account
-            for attachment in attachments:
-                mail_item.Attachments.Add(str(attachment))
-            mail_item.Save()
-            mail_item.Move(drafts)
+        account = drafts = None
+        if RUNDMAIL_SINK == "outlook":
+            outlook_app = com_resilience.wrap(win32.gencache.EnsureDispatch("Outlook.Application"), "Outlook")
+            account, drafts = com_resilience.outlook_drafts(outlook_app, SMTP_INFO)
+            if account is None:
+                print(f"[WARN] Outlook-Account '{SMTP_INFO}' nicht gefunden.")
+                sys.exit(1)
+
+        for position, recipient in enumerate(recipients, start=1):
+            if position <= skip:
+                continue
+            create_rundmail_draft(
+                word_app, outlook_app, account, drafts, subject, pool, recipient, tmpdir
+            )
             created += 1
+            last_email = recipient["email"]
+            if streaming and created % RUNDMAIL_CHECKPOINT_EVERY == 0:
+                save_checkpoint(signature, skip + created, last_email)
+                print(f"[INFO] Checkpoint: {skip + created} Entwürfe ({last_email})")
 
+        if streaming:
+            clear_checkpoint()
         print(f"[INFO] Rundmail-Entwürfe erstellt: {format_count(created, 'Entwurf', 'Entwürfe')}")
+        print(f"[INFO] {com_resilience.STATS.summary()}")
         try:
-            if attachments:
+            # Nur archivieren, wenn die Anhänge tatsächlich in Entwürfen stecken
+            if pool.files and skip + created > 0:
                 try:
-                    archive_attachments(attachments, datetime.now().strftime("%Y_%m_%d"))
+                    archive_attachments(pool.files, datetime.now().strftime("%Y_%m_%d"))
                 except Exception as exc:
                     print(f"[WARN] Rundmail-Anhänge konnten nicht archiviert werden: {exc}")
             os.startfile(str(excel_path))
@@ -327,6 +520,9 @@ def main() -> None:
 
     except Exception as exc:  # pragma: no cover - COM-Fehler
         print(f"[WARN] Rundmail konnte nicht vollständig ausgeführt werden: {exc}")
+        if streaming and created:
+            save_checkpoint(signature, skip + created, last_email)
+            print(f"[INFO] Fortsetzung ab Entwurf {skip + created + 1} mit --stream möglich.")
         sys.exit(1)
     finally:
         if word_app is not None:
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""Robuste COM-Aufrufe für Word/Outlook.
+
+Wenn Outlook gerade synchronisiert, lehnt es Aufrufe wie Save(), Move() oder
+Attachments.Add() mit "Aufruf vom Aufgerufenen abgelehnt" ab. `wrap()` legt einen
+Proxy um ein COM-Objekt, der solche Aufrufe mit Backoff wiederholt, alle
+Rückgabe-Objekte ebenfalls umhüllt und die Dauer jedes Aufrufs mitschreibt.
+
+Selbsttest ohne Office (auch unter Linux):  python com_resilience.py
+"""
+from __future__ import annotations
+
+import time
+
+# HRESULTs für "Server beschäftigt" (Aufruf wurde nicht ausgeführt, Wiederholung ist sicher)
+RPC_E_CALL_REJECTED = -2147418111        # 0x80010001
+RPC_E_SERVERCALL_RETRYLATER = -2147417846  # 0x8001010A
+RETRYABLE_HRESULTS = {RPC_E_CALL_REJECTED, RPC_E_SERVERCALL_RETRYLATER}
+
+RETRY_MAX_ATTEMPTS = 8
+RETRY_BASE_DELAY = 0.1   # Sekunden, verdoppelt sich pro Versuch
+RETRY_MAX_DELAY = 5.0
+
+
+def _hresult(exc: Exception) -> int | None:
+    """HRESULT aus pywintypes.com_error (oder dem Fake) lesen, auch aus excepinfo."""
+
+    args = getattr(exc, "args", ())
+    if args and isinstance(args[0], int):
+        if args[0] in RETRYABLE_HRESULTS:
+            return args[0]
+        if len(args) > 2 and isinstance(args[2], tuple) and len(args[2]) > 5:
+            return args[2][5]
+        return args[0]
+    return None
+
+
+class CallStats:
+    """Anzahl, Gesamt-/Maximaldauer und Wiederholungen je COM-Aufruf."""
+
+    # Obergrenze für Einzelmessungen je Aufruf (für Aufzeichnungen)
+    MAX_SAMPLES = 1000
+
+    def __init__(self):
+        self.calls: dict[str, list] = {}
+        self.keep_samples = False
+        self.samples: dict[str, list[float]] = {}
+
+    def record(self, name: str, seconds: float, retries: int) -> None:
+        entry = self.calls.setdefault(name, [0, 0.0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        entry[3] += retries
+        # Property-Sets (HTMLBody, FormattedText) gehören zu den teuersten Aufrufen und zählen mit
+        if self.keep_samples and not name.startswith(("get ", "iter ")):
+            samples = self.samples.setdefault(name, [])
+            if len(samples) < self.MAX_SAMPLES:
+                samples.append(round(seconds, 4))
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.samples.clear()
+
+    def summary(self) -> str:
+        if not self.calls:
+            return "COM: keine Aufrufe"
+        total = sum(e[0] for e in self.calls.values())
+        retries = sum(e[3] for e in self.calls.values())
+        name, (count, secs, _, _) = max(self.calls.items(), key=lambda kv: kv[1][1])
+        return (
+            f"COM: {total} Aufrufe, {retries} Wiederholungen, "
+            f"teuerster: {name} ({count}x, Ø {secs / count * 1000:.0f} ms)"
+        )
+
+
+STATS = CallStats()
+
+
+def call_with_retry(name: str, func, *args, **kwargs):
+    """Führt einen COM-Aufruf aus und wiederholt ihn bei "Server beschäftigt"."""
+
+    delay = RETRY_BASE_DELAY
+    start = time.perf_counter()
+    for attempt in range(RETRY_MAX_ATTEMPTS):
+        try:
+            result = func(*args, **kwargs)
+            STATS.record(name, time.perf_counter() - start, attempt)
+            return result
+        except Exception as exc:
+            if _hresult(exc) not in RETRYABLE_HRESULTS or attempt == RETRY_MAX_ATTEMPTS - 1:
+                STATS.record(name, time.perf_counter() - start, attempt)
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_DELAY)
+
+
+def _is_com_object(value) -> bool:
+    return hasattr(value, "_oleobj_")
+
+
+def _unwrap(value):
+    return object.__getattribute__(value, "_obj") if isinstance(value, ComProxy) else value
+
+
+def wrap(value, path: str = ""):
+    if value is None or isinstance(value, ComProxy) or not _is_com_object(value):
+        return value
+    return ComProxy(value, path)
+
+
+class ComProxy:
+    """Umhüllt ein COM-Objekt: Property-Zugriffe und Methodenaufrufe laufen über call_with_retry."""
+
+    __slots__ = ("_obj", "_path")
+
+    def __init__(self, obj, path: str = ""):
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_path", path or type(obj).__name__)
+
+    def __getattr__(self, name):
+        obj = object.__getattribute__(self, "_obj")
+        label = f"{object.__getattribute__(self, '_path')}.{name}"
+        value = call_with_retry(f"get {label}", getattr, obj, name)
+        if _is_com_object(value):
+            return wrap(value, label)
+        if callable(value):
+            def method(*args, **kwargs):
+                args = [_unwrap(a) for a in args]
+                kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+                return wrap(call_with_retry(label, value, *args, **kwargs), label)
+            return method
+        return value
+
+    def __setattr__(self, name, value):
+        obj = object.__getattribute__(self, "_obj")
+        label = f"set {object.__getattribute__(self, '_path')}.{name}"
+        call_with_retry(label, setattr, obj, name, _unwrap(value))
+
+    def __call__(self, *args, **kwargs):
+        obj = object.__getattribute__(self, "_obj")
+        label = object.__getattribute__(self, "_path")
+        args = [_unwrap(a) for a in args]
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+        return wrap(call_with_retry(f"{label}()", obj, *args, **kwargs), label)
+
+    def __iter__(self):
+        obj = object.__getattribute__(self, "_obj")
+        label = object.__getattribute__(self, "_path")
+        for item in call_with_retry(f"iter {label}", list, obj):
+            yield wrap(item, label)
+
+    def set_properties(self, **props) -> None:
+        """Setzt mehrere Properties nacheinander; ein Fehler nennt die betroffene Property."""
+
+        for name, value in props.items():
+            setattr(self, name, value)
+
+
+def install_message_filter() -> bool:
+    """Registriert einen OLE-Message-Filter, der abgelehnte Aufrufe selbst wiederholt.
+
+    Ohne pywin32 (oder ohne IMessageFilter-Unterstützung) greift nur der Python-seitige Retry.
+    """
+
+    try:
+        import pythoncom
+        from win32com.server.util import wrap as server_wrap
+    except Exception:
+        return False
+
+    class _MessageFilter:
+        _com_interfaces_ = [pythoncom.IID_IMessageFilter]
+        _public_methods_ = ["HandleInComingCall", "RetryRejectedCall", "MessagePending"]
+
+        def HandleInComingCall(self, dwCallType, htaskCaller, dwTickCount, lpInterfaceInfo):
+            return 0  # SERVERCALL_ISHANDLED
+
+        def RetryRejectedCall(self, htaskCallee, dwTickCount, dwRejectType):
+            if dwRejectType == 2 and dwTickCount < 30000:  # SERVERCALL_RETRYLATER
+                return 150  # nach 150 ms erneut versuchen
+            return -1
+
+        def MessagePending(self, htaskCallee, dwTickCount, dwPendingType):
+            return 2  # PENDINGMSG_WAITDEFPROCESS
+
+    try:
+        pythoncom.CoRegisterMessageFilter(server_wrap(_MessageFilter(), pythoncom.IID_IMessageFilter))
+    except Exception:
+        return False
+    return True
+
+
+# Zwischengespeicherte Outlook-Sitzung: (SMTP) -> (Konto, Entwürfe-Ordner)
+_SESSION_CACHE: dict[str, tuple] = {}
+
+
+def outlook_drafts(outlook, smtp: str) -> tuple:
+    """Liefert (Konto, Entwürfe-Ordner) für die SMTP-Adresse, einmal pro Lauf ermittelt."""
+
+    key = smtp.strip().lower()
+    cached = _SESSION_CACHE.get(key)
+    if cached is not None:
+        return cached
+    ns = outlook.GetNamespace("MAPI")
+    for account in ns.Accounts:
+        try:
+            if str(account.SmtpAddress).strip().lower() == key:
+                cached = (account, account.DeliveryStore.GetDefaultFolder(16))  # olFolderDrafts
+                _SESSION_CACHE[key] = cached
+                return cached
+        except Exception:
+            pass
+    return None, None
+
+
+def run_selftest() -> None:
+    """Prüft Retry/Backoff gegen ein Fake-Outlook, das Aufrufe verzögert und ablehnt."""
+
+    import fake_com
+
+    global RETRY_BASE_DELAY
+    old_delay, RETRY_BASE_DELAY = RETRY_BASE_DELAY, 0.001
+    try:
+        backend = fake_com.FakeBackend(reject_rate=0.3, latency={"Save": 0.002}, seed=7)
+        outlook = wrap(fake_com.FakeOutlook(backend, accounts=["info@ltme-consulting.de"]))
+        account, drafts = outlook_drafts(outlook, "info@ltme-consulting.de")
+        assert account is not None and drafts is not None
+        for i in range(50):
+            mail = outlook.CreateItem(0)
+            mail.set_properties(BodyFormat=2, HTMLBody="<p>x</p>", To=f"m{i}@example.com", Subject="Test")
+            mail.Attachments.Add("a.png")
+            mail.Save()
+            mail.Move(drafts)
+        assert len(_unwrap(drafts).items) == 50
+        assert backend.rejections > 0
+    finally:
+        RETRY_BASE_DELAY = old_delay
+        _SESSION_CACHE.clear()
+    print(f"[OK] COM-Retry Selftest ({backend.rejections} Ablehnungen abgefangen; {STATS.summary()})")
+
+
+if __name__ == "__main__":
+    run_selftest()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Fake-Word/Outlook für Tests und Messungen ohne Office (z.B. unter Linux).
+
+Die Objekte bilden nur die Teile der COM-Schnittstelle nach, die Mail LTME.py und
+Rundmail.py benutzen. Ein FakeBackend steuert Verzögerungen (fest oder je Aufruf
+aus einer Liste) und lehnt Aufrufe zufällig mit RPC_E_CALL_REJECTED ab. Auch das
+Setzen vorhandener Properties läuft über das Backend (Name "set HTMLBody" usw.).
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+
+RPC_E_CALL_REJECTED = -2147418111
+
+
+class FakeComError(Exception):
+    """Wie pywintypes.com_error: args = (hresult, text, excepinfo, argerr)."""
+
+    def __init__(self, hresult: int, text: str = "Call was rejected by callee."):
+        super().__init__(hresult, text, None, None)
+
+
+class FakeBackend:
+    """Zentrale Steuerung: latency = {Methodenname: Sekunden oder Liste von Sekunden}."""
+
+    def __init__(self, reject_rate: float = 0.0, latency: dict | None = None, seed: int | None = None):
+        self.reject_rate = reject_rate
+        self.latency = dict(latency or {})
+        self.rng = random.Random(seed)
+        self.rejections = 0
+        self.calls: dict[str, int] = {}
+
+    def call(self, name: str) -> None:
+        if self.reject_rate and self.rng.random() < self.reject_rate:
+            self.rejections += 1
+            raise FakeComError(RPC_E_CALL_REJECTED)
+        n = self.calls.get(name, 0)
+        self.calls[name] = n + 1
+        delay = self.latency.get(name, 0.0)
+        if isinstance(delay, (list, tuple)):
+            # Aufgezeichnete Latenzen der Reihe nach abspielen (zyklisch)
+            delay = delay[n % len(delay)] if delay else 0.0
+        if delay:
+            time.sleep(delay)
+
+
+class FakeComObject:
+    _oleobj_ = True  # wird von com_resilience.wrap als COM-Objekt erkannt
+
+    def __init__(self, backend: FakeBackend):
+        self._backend = backend
+
+    def __setattr__(self, name, value):
+        # Setzen einer bestehenden COM-Property (z.B. HTMLBody) kostet wie ein Aufruf: "set <Name>"
+        if name[:1].isupper() and name in self.__dict__:
+            self._backend.call(f"set {name}")
+        object.__setattr__(self, name, value)
+
+
+# =========================
+# Outlook
+# =========================
+class FakeFolder(FakeComObject):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.items: list = []
+
+
+class FakeStore(FakeComObject):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.drafts = FakeFolder(backend)
+
+    def GetDefaultFolder(self, folder_id: int):
+        self._backend.call("GetDefaultFolder")
+        return self.drafts
+
+
+class FakeAccount(FakeComObject):
+    def __init__(self, backend, smtp: str):
+        super().__init__(backend)
+        self.SmtpAddress = smtp
+        self.DeliveryStore = FakeStore(backend)
+
+
+class FakeAccounts(FakeComObject):
+    def __init__(self, backend, accounts: list[str]):
+        super().__init__(backend)
+        self._items = [FakeAccount(backend, smtp) for smtp in accounts]
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class FakeNamespace(FakeComObject):
+    def __init__(self, backend, accounts: list[str]):
+        super().__init__(backend)
+        self.Accounts = FakeAccounts(backend, accounts)
+
+
+class FakeAttachments(FakeComObject):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.paths: list[str] = []
+
+    def Add(self, path):
+        self._backend.call("Attachments.Add")
+        self.paths.append(str(path))
+
+
+class FakeMailItem(FakeComObject):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.BodyFormat = 1
+        self.HTMLBody = ""
+        self.To = ""
+        self.Subject = ""
+        self.SendUsingAccount = None
+        self.Attachments = FakeAttachments(backend)
+        self.saved = False
+
+    def Save(self):
+        self._backend.call("Save")
+        self.saved = True
+
+    def Move(self, folder):
+        self._backend.call("Move")
+        folder.items.append(self)
+        return self
+
+
+class FakeOutlook(FakeComObject):
+    def __init__(self, backend, accounts: list[str] | None = None):
+        super().__init__(backend)
+        self._ns = FakeNamespace(backend, accounts or [])
+
+    def GetNamespace(self, name: str):
+        return self._ns
+
+    def CreateItem(self, item_type: int):
+        self._backend.call("CreateItem")
+        return FakeMailItem(self._backend)
+
+
+# =========================
+# Word
+# =========================
+class FakeFind(FakeComObject):
+    def __init__(self, backend, content):
+        super().__init__(backend)
+        self._content = content
+        self.Replacement = FakeComObject(backend)
+        self.Replacement.ClearFormatting = lambda: None
+
+    def ClearFormatting(self):
+        pass
+
+    def Execute(self, FindText="", ReplaceWith="", Replace=None, **kwargs):
+        self._backend.call("Find.Execute")
+        # intern, kein Property-Set des Aufrufers
+        text = self._content.FormattedText.replace(FindText, ReplaceWith)
+        object.__setattr__(self._content, "FormattedText", text)
+        return True
+
+
+class FakeContent(FakeComObject):
+    def __init__(self, backend, text: str = ""):
+        super().__init__(backend)
+        self.FormattedText = text
+        self.Find = FakeFind(backend, self)
+
+
+class FakeDocument(FakeComObject):
+    def __init__(self, backend, text: str = ""):
+        super().__init__(backend)
+        self.Content = FakeContent(backend, text)
+        self.WebOptions = FakeComObject(backend)
+        self.Paragraphs = []
+
+    def SaveAs2(self, FileName="", FileFormat=None, **kwargs):
+        self._backend.call("SaveAs2")
+        with open(FileName, "w", encoding="utf-8") as f:
+            f.write(
+                "<html><head><style>p{font-family:Calibri}</style></head>"
+                f"<body><p>{self.Content.FormattedText}</p></body></html>"
+            )
+
+    def Close(self, save_changes=False):
+        self._backend.call("Close")
+
+
+class FakeDocuments(FakeComObject):
+    def Open(self, FileName="", ReadOnly=True, **kwargs):
+        self._backend.call("Documents.Open")
+        # Vorlagentext: Dateiname + alle bekannten Platzhalter
+        name = os.path.basename(str(FileName))
+        return FakeDocument(
+            self._backend,
+            f"{name}: {{{{Vorname}}}} {{{{Zeitraum}}}} {{{{Zahllast}}}} {{{{UStVA-Intervall}}}} {{{{Feedback}}}}",
+        )
+
+    def Add(self):
+        self._backend.call("Documents.Add")
+        return FakeDocument(self._backend)
+
+
+class FakeWord(FakeComObject):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.Visible = False
+        self.Documents = FakeDocuments(backend)
+
+    def Quit(self, SaveChanges=False):
+        pass
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""Inhaltsadressiertes Archiv aller erzeugten Mails.
+
+Jede Mail wird als Manifest-Zeile (Header, Metadaten, Verweise) abgelegt; Inhalte
+liegen als Blobs unter ihrem SHA256. Das Word-HTML-Gerüst (alles bis einschließlich
+<body>) wird pro Vorlage nur einmal gespeichert und dient gleichzeitig als
+Kompressions-Wörterbuch für den eigentlichen Body. Was Word bei jedem Export neu
+schreibt (Dokumenteigenschaften, <link>s auf den Exportnamen), wird aus dem Gerüst
+gelöst und mit dem Body gespeichert. Identische Anhänge landen einmal im Archiv,
+egal wie oft sie verschickt wurden.
+
+Aufbau:
+    <root>/objects/ab/abcdef...      Blobs (zstd/zlib oder roh)
+    <root>/manifest/2025.jsonl       eine Zeile pro Mail
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+try:  # optional: bessere Kompression, falls installiert
+    import zstandard as zstd
+except Exception:  # pragma: no cover - zstandard fehlt
+    zstd = None
+
+_BODY_TAG_RE = re.compile(r"<body[^>]*>", flags=re.IGNORECASE)
+# Pro Dokument verschieden: <xml><o:DocumentProperties>…</o:DocumentProperties></xml> und
+# die <link>-Tags (File-List, themeData, colorSchemeMapping), die auf den Exportnamen zeigen
+_VOLATILE_RE = re.compile(
+    r"<xml>\s*<o:DocumentProperties>.*?</o:DocumentProperties>\s*</xml>|<link\b[^>]*>",
+    flags=re.IGNORECASE | re.DOTALL,
+)
+_VOLATILE_MARK = "<!--ltme:docprops-->"
+
+# Cache für Anhang-Hashes: (Pfad, Größe, mtime) -> SHA256
+_FILE_HASH_CACHE: dict[tuple[str, int, int], str] = {}
+
+
+def _blob_path(root: Path, digest: str) -> Path:
+    return root / "objects" / digest[:2] / digest
+
+
+def _write_blob(root: Path, digest: str, payload: bytes) -> None:
+    target = _blob_path(root, digest)
+    if target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, target)
+
+
+def _compress(data: bytes, zdict: bytes | None) -> tuple[str, bytes]:
+    if zstd is not None:
+        if zdict:
+            cdict = zstd.ZstdCompressionDict(zdict, dict_type=zstd.DICT_TYPE_RAWCONTENT)
+            return "zstd-dict", zstd.ZstdCompressor(level=19, dict_data=cdict).compress(data)
+        return "zstd", zstd.ZstdCompressor(level=19).compress(data)
+    if zdict:
+        comp = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+        return "zlib-dict", comp.compress(data) + comp.flush()
+    return "zlib", zlib.compress(data, 9)
+
+
+def _decompress(codec: str, payload: bytes, zdict: bytes | None) -> bytes:
+    if codec == "raw":
+        return payload
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    if codec == "zlib-dict":
+        decomp = zlib.decompressobj(zlib.MAX_WBITS, zdict)
+        return decomp.decompress(payload) + decomp.flush()
+    if zstd is None:
+        raise RuntimeError(f"Blob mit Codec '{codec}' benötigt das Paket 'zstandard'.")
+    if codec == "zstd-dict":
+        ddict = zstd.ZstdCompressionDict(zdict, dict_type=zstd.DICT_TYPE_RAWCONTENT)
+        return zstd.ZstdDecompressor(dict_data=ddict).decompress(payload)
+    return zstd.ZstdDecompressor().decompress(payload)
+
+
+def put_bytes(root: Path, data: bytes, zdict: bytes | None = None) -> dict:
+    """Legt Bytes komprimiert ab und liefert die Referenz für das Manifest.
+
+    Kopfzeile jedes Blobs: "<codec> <wörterbuch-hash|->", danach die Nutzdaten.
+    """
+
+    digest = hashlib.sha256(data).hexdigest()
+    if not _blob_path(root, digest).exists():
+        dict_hash = "-"
+        if zdict:
+            dict_hash = hashlib.sha256(zdict).hexdigest()
+            _write_blob(root, dict_hash, b"zlib -\n" + zlib.compress(zdict, 9))
+        codec, payload = _compress(data, zdict)
+        _write_blob(root, digest, f"{codec} {dict_hash}\n".encode("ascii") + payload)
+    return {"hash": digest}
+
+
+def file_sha256(path: Path) -> str:
+    st = path.stat()
+    key = (str(path), st.st_size, st.st_mtime_ns)
+    digest = _FILE_HASH_CACHE.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _FILE_HASH_CACHE[key] = digest
+    return digest
+
+
+def put_file(root: Path, path: Path) -> dict:
+    """Anhänge (PNG/PDF sind schon komprimiert) werden roh und nur einmal abgelegt."""
+
+    digest = file_sha256(path)
+    target = _blob_path(root, digest)
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            dst.write(b"raw -\n")
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp, target)
+    return {"hash": digest, "name": path.name}
+
+
+def get_bytes(root: Path, ref: dict) -> bytes:
+    header, payload = _blob_path(root, ref["hash"]).read_bytes().split(b"\n", 1)
+    codec, dict_hash = header.decode("ascii").split(" ", 1)
+    zdict = get_bytes(root, {"hash": dict_hash}) if dict_hash != "-" else None
+    return _decompress(codec, payload, zdict)
+
+
+def split_skeleton(html: str) -> tuple[str, list[str], str]:
+    """Trennt das Word-Gerüst (Head inkl. Styles bis <body>) vom individuellen Inhalt.
+
+    Liefert (Gerüst, veränderliche Blöcke, Body); die Blöcke sind im Gerüst durch
+    _VOLATILE_MARK ersetzt, damit gleiche Vorlagen dasselbe Gerüst ergeben.
+    """
+
+    m = _BODY_TAG_RE.search(html)
+    if not m:
+        return "", [], html
+    head = html[:m.end()]
+    volatile = _VOLATILE_RE.findall(head)
+    return _VOLATILE_RE.sub(_VOLATILE_MARK, head), volatile, html[m.end():]
+
+
+def archive_mail(
+    root: Path, meta: dict, to: str, subject: str, html: str,
+    attachments: Iterable[Path] = (),
+) -> dict:
+    """Schreibt eine erzeugte Mail ins Archiv und liefert den Manifest-Eintrag."""
+
+    root = Path(root)
+    skeleton, volatile, body = split_skeleton(html)
+    skeleton_bytes = skeleton.encode("utf-8")
+    record = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "to": to,
+        "subject": subject,
+        **meta,
+        "skeleton": put_bytes(root, skeleton_bytes) if skeleton else None,
+        # Veränderliche Blöcke stehen vor dem Body, "volatile" hält ihre Längen (Zeichen)
+        "body": put_bytes(root, ("".join(volatile) + body).encode("utf-8"), skeleton_bytes or None),
+        "volatile": [len(block) for block in volatile],
+        "attachments": [put_file(root, Path(p)) for p in attachments],
+    }
+    manifest = root / "manifest" / f"{datetime.now():%Y}.jsonl"
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return record
+
+
+def iter_archive(root: Path, year: str | None = None) -> Iterator[dict]:
+    manifest_dir = Path(root) / "manifest"
+    pattern = f"{year}.jsonl" if year else "*.jsonl"
+    for manifest in sorted(manifest_dir.glob(pattern)):
+        with open(manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_html(root: Path, record: dict) -> str:
+    """Setzt das HTML einer archivierten Mail wieder zusammen (für Replay/Nachweis)."""
+
+    root = Path(root)
+    skeleton = get_bytes(root, record["skeleton"]).decode("utf-8") if record.get("skeleton") else ""
+    body = get_bytes(root, record["body"]).decode("utf-8")
+    for length in record.get("volatile", []):
+        skeleton = skeleton.replace(_VOLATILE_MARK, body[:length], 1)
+        body = body[length:]
+    return skeleton + body
+
+
+def load_attachment(root: Path, ref: dict) -> bytes:
+    return get_bytes(Path(root), ref)
+
+
+def run_selftest() -> None:
+    """Zwei Word-Exporte derselben Vorlage teilen sich ein Gerüst und lassen sich exakt zurückbauen."""
+
+    import tempfile
+
+    def export(name: str, created: str, words: int, body: str) -> str:
+        return (
+            "<html xmlns:o='urn:schemas-microsoft-com:office:office'><head>"
+            "<meta http-equiv=Content-Type content='text/html; charset=utf-8'>"
+            f'<link rel=File-List href="{name}-Dateien/filelist.xml">'
+            f'<link rel=themeData href="{name}-Dateien/themedata.thmx">'
+            f'<link rel=colorSchemeMapping href="{name}-Dateien/colorschememapping.xml">'
+            "<!--[if gte mso 9]><xml>\n <o:DocumentProperties>\n"
+            f"  <o:Created>{created}</o:Created>\n  <o:Words>{words}</o:Words>\n"
+            " </o:DocumentProperties>\n</xml><![endif]-->"
+            "<style>p.MsoNormal{font-family:Calibri}</style></head>"
+            f"<body lang=DE><p class=MsoNormal>{body}</p></body></html>"
+        )
+
+    mails = [
+        export("mail_20250101_101500_123456", "2025-01-01T10:15:00Z", 42, "Hallo Anna"),
+        export("mail_20250101_101501_654321", "2025-01-01T10:15:01Z", 43, "Hallo Bernd"),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        records = [archive_mail(Path(tmp), {}, "a@example.invalid", "Test", html) for html in mails]
+        assert records[0]["skeleton"] == records[1]["skeleton"], "Gerüst nicht geteilt"
+        for html, rec in zip(mails, records):
+            assert load_html(Path(tmp), rec) == html
+    print("[OK] mail_archive Selftest (ein Gerüst für zwei Exporte)")
+
+
+if __name__ == "__main__":
+    # python mail_archive.py <Archivordner> [Jahr]   bzw.   python mail_archive.py --selftest
+    if sys.argv[1:] == ["--selftest"]:
+        run_selftest()
+        sys.exit(0)
+    if len(sys.argv) < 2:
+        print("Aufruf: python mail_archive.py <Archivordner> [Jahr]")
+        sys.exit(1)
+    for rec in iter_archive(Path(sys.argv[1]), sys.argv[2] if len(sys.argv) > 2 else None):
+        names = ", ".join(a["name"] for a in rec.get("attachments", []))
+        print(f"{rec['ts']}  {rec.get('mandant', '-'):>6}  {rec['to']}  {rec['subject']}  {names}")
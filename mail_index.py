@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Volltextindex (SQLite FTS5) über alle erzeugten Mandanten-Mails.
+
+Mail LTME.py trägt jede erzeugte Mail während des Laufs ein (Datei .ltme_index.sqlite
+neben der Arbeitsmappe, siehe PATH_MAIL_INDEX); die Suche läuft lokal:
+
+    python mail_index.py "bank" --db <Index>                       -> alle Treffer
+    python mail_index.py "bank AND Q2" --mandant 10010 --db <Index>
+    python mail_index.py "2025-04" --db <Index>                    -> Monat (als Phrase)
+"""
+from __future__ import annotations
+
+import argparse
+import html as _html
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS mails USING fts5(
+    mandant, period, mail_type, subject, content, attachments,
+    ts UNINDEXED, recipient UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_LI_RE = re.compile(r"</?(li|ul|br|div|p)[^>]*>", flags=re.IGNORECASE)
+
+_CONNECTIONS: dict[str, sqlite3.Connection] = {}
+
+# Begriffe mit Bindestrich (2025-04, UStVA-Ergebnis) außerhalb von "…"
+_QUOTED_OR_HYPHEN_RE = re.compile(r'("[^"]*")|(\w+(?:-\w+)+)')
+
+
+def html_to_text(fragment: str) -> str:
+    """Macht aus dem Feedback-HTML (verschachtelte <ul>/<li>) Klartext, eine Zeile pro Punkt."""
+
+    text = _LI_RE.sub("\n", fragment or "")
+    text = _html.unescape(_TAG_RE.sub("", text))
+    return "\n".join(ln.strip() for ln in text.splitlines() if ln.strip())
+
+
+def open_index(db_path: str | Path) -> sqlite3.Connection:
+    key = str(db_path)
+    conn = _CONNECTIONS.get(key)
+    if conn is None:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key)
+        conn.execute(_SCHEMA)
+        _CONNECTIONS[key] = conn
+    return conn
+
+
+def index_mail(
+    db_path: str | Path, mandant: str, period: str, mail_type: str, subject: str,
+    content: str = "", attachments: list[str] | None = None, recipient: str = "",
+) -> None:
+    """Trägt eine Mail ein und committet sofort (Index bleibt bei Abbruch konsistent)."""
+
+    conn = open_index(db_path)
+    conn.execute(
+        "INSERT INTO mails (mandant, period, mail_type, subject, content, attachments, ts, recipient)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            mandant, period, mail_type, subject, content,
+            " ".join(attachments or []),
+            datetime.now().isoformat(timespec="seconds"), recipient,
+        ),
+    )
+    conn.commit()
+
+
+def quote_hyphenated(query: str) -> str:
+    """Setzt Begriffe mit Bindestrich in Anführungszeichen, sonst liest FTS5 "-" als Spaltenfilter."""
+
+    return _QUOTED_OR_HYPHEN_RE.sub(lambda m: m.group(1) or f'"{m.group(2)}"', query)
+
+
+def search(db_path: str | Path, query: str, mandant: str | None = None, limit: int = 50) -> list[dict]:
+    query = quote_hyphenated(query)
+    conn = open_index(db_path)
+    sql = (
+        "SELECT mandant, period, mail_type, subject, ts, recipient,"
+        " snippet(mails, 4, '[', ']', ' … ', 12)"
+        " FROM mails WHERE mails MATCH ?"
+    )
+    params: list = [query]
+    if mandant:
+        sql += " AND mandant = ?"
+        params.append(mandant)
+    sql += " ORDER BY ts DESC LIMIT ?"
+    params.append(limit)
+    keys = ("mandant", "period", "mail_type", "subject", "ts", "recipient", "snippet")
+    return [dict(zip(keys, row)) for row in conn.execute(sql, params)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Suche in erzeugten LTME-Mails")
+    parser.add_argument("query", help="FTS5-Suchausdruck, z.B. 'bank AND Q2'")
+    parser.add_argument("--mandant", help="nur diesen Mandanten durchsuchen")
+    parser.add_argument("--db", required=True, help="Pfad zur Index-Datei (PATH_MAIL_INDEX in Mail LTME.py)")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    if not Path(args.db).is_file():
+        print(f"[WARN] Index nicht gefunden: {args.db}")
+        sys.exit(1)
+    try:
+        hits = search(args.db, args.query, args.mandant, args.limit)
+    except sqlite3.OperationalError as exc:
+        print(f"[WARN] Suchausdruck ungültig: {exc}")
+        sys.exit(1)
+
+    for hit in hits:
+        print(f"{hit['ts'][:10]}  {hit['mandant']:>6}  {hit['mail_type']:<8}  {hit['subject']}")
+        if hit["snippet"]:
+            print(f"    {hit['snippet']}")
+    print(f"[INFO] {len(hits)} Treffer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Streamender MIME-Writer für Ausgabewege ohne Outlook (.eml-Dateien, Sockets).
+
+Header und HTML-Teil werden direkt geschrieben, Anhänge blockweise aus einer
+memory-mapped Quelldatei base64-kodiert. Pro Mail liegen so nur wenige hundert KB
+im Speicher, unabhängig von der Größe der PNG/PDF-Anhänge.
+"""
+from __future__ import annotations
+
+import base64
+import mimetypes
+import mmap
+import os
+import uuid
+from email.header import Header
+from email.utils import encode_rfc2231, formatdate, make_msgid
+from pathlib import Path
+from typing import BinaryIO, Iterable, Union
+
+# Vorab kodierter Anhang: (Dateiname, Content-Type, base64-Bytes mit CRLF-Zeilen)
+EncodedPart = tuple[str, str, bytes]
+
+# 57 Rohbytes = eine base64-Zeile à 76 Zeichen; 1024 Zeilen ≈ 57 KB pro Block
+_LINE_BYTES = 57
+_BLOCK_BYTES = _LINE_BYTES * 1024
+
+
+def _write_b64(data, out: BinaryIO) -> None:
+    """Kodiert ein bytes-ähnliches Objekt (auch mmap) blockweise mit CRLF-Zeilen."""
+
+    for offset in range(0, len(data), _BLOCK_BYTES):
+        block = base64.encodebytes(data[offset:offset + _BLOCK_BYTES])
+        out.write(block.replace(b"\n", b"\r\n"))
+
+
+def _write_file_b64(path: Path, out: BinaryIO) -> None:
+    if os.path.getsize(path) == 0:  # mmap kann keine leeren Dateien abbilden
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _write_b64(mm, out)
+
+
+def _header(name: str, value: str) -> bytes:
+    try:
+        value.encode("ascii")
+    except UnicodeEncodeError:
+        # Gefaltete Zeilen ebenfalls mit CRLF, sonst steht ein nacktes LF in der Mail
+        value = Header(value, "utf-8", maxlinelen=76, header_name=name).encode(linesep="\r\n")
+    return f"{name}: {value}\r\n".encode("ascii")
+
+
+def _filename_params(name: str) -> str:
+    try:
+        name.encode("ascii")
+        return f'filename="{name}"'
+    except UnicodeEncodeError:
+        return f"filename*={encode_rfc2231(name, 'utf-8')}"
+
+
+def write_message(
+    out: BinaryIO, sender: str, to: str, subject: str, html: str,
+    attachments: Iterable[Union[Path, EncodedPart]] = (), draft: bool = True,
+) -> None:
+    """Schreibt eine vollständige multipart/mixed-Mail nach `out`.
+
+    Anhänge sind Pfade (werden hier gestreamt kodiert) oder bereits kodierte
+    EncodedPart-Tupel, die unverändert übernommen werden (z.B. Rundmail-Anhänge,
+    die für alle Empfänger nur einmal kodiert werden).
+    Mit draft=True wird "X-Unsent: 1" gesetzt, Outlook öffnet die .eml dann als Entwurf.
+    """
+
+    attachments = [a if isinstance(a, tuple) else Path(a) for a in attachments]
+    boundary = f"=_ltme_{uuid.uuid4().hex}"
+
+    out.write(_header("From", sender))
+    out.write(_header("To", to))
+    out.write(_header("Subject", subject))
+    out.write(_header("Date", formatdate(localtime=True)))
+    out.write(_header("Message-ID", make_msgid(domain=sender.rsplit("@", 1)[-1] or None)))
+    out.write(b"MIME-Version: 1.0\r\n")
+    if draft:
+        out.write(b"X-Unsent: 1\r\n")
+    out.write(f'Content-Type: multipart/mixed; boundary="{boundary}"\r\n\r\n'.encode("ascii"))
+
+    out.write(f"--{boundary}\r\n".encode("ascii"))
+    out.write(b"Content-Type: text/html; charset=utf-8\r\n")
+    out.write(b"Content-Transfer-Encoding: base64\r\n\r\n")
+    _write_b64(html.encode("utf-8"), out)
+
+    for item in attachments:
+        if isinstance(item, tuple):
+            name, ctype, encoded = item
+        else:
+            name, encoded = item.name, None
+            ctype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        out.write(f"\r\n--{boundary}\r\n".encode("ascii"))
+        out.write(f"Content-Type: {ctype}\r\n".encode("ascii"))
+        out.write(b"Content-Transfer-Encoding: base64\r\n")
+        out.write(f"Content-Disposition: attachment; {_filename_params(name)}\r\n\r\n".encode("ascii"))
+        if encoded is None:
+            _write_file_b64(item, out)
+        else:
+            out.write(encoded)
+
+    out.write(f"\r\n--{boundary}--\r\n".encode("ascii"))
+
+
+def write_eml(
+    target_dir: str | Path, sender: str, to: str, subject: str, html: str,
+    attachments: Iterable[Union[Path, EncodedPart]] = (),
+) -> Path:
+    """Schreibt den Entwurf als .eml-Datei (atomar) und liefert den Pfad."""
+
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    safe_to = "".join(ch if ch.isalnum() or ch in "@.-_" else "_" for ch in to)[:60]
+    target = target_dir / f"{safe_to}_{uuid.uuid4().hex[:8]}.eml"
+    tmp = target.with_suffix(".eml.tmp")
+    with open(tmp, "wb", buffering=256 * 1024) as out:
+        write_message(out, sender, to, subject, html, attachments)
+    os.replace(tmp, target)
+    return target
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Snapshot-Cache für Tabellen aus der Arbeitsmappe (geteilt von Mail LTME.py und Rundmail.py).
+
+Eine gelesene Tabelle wird als Pickle neben einer kleinen JSON-Metadatei abgelegt.
+Schlüssel ist Größe + mtime der Arbeitsmappe; weichen diese ab (z.B. OneDrive hat
+nur den Zeitstempel angefasst), entscheidet der SHA1 der Datei. Nur bei echter
+Änderung wird die Arbeitsmappe neu geparst bzw. Excel gestartet.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+SNAPSHOT_VERSION = 1
+
+
+def file_sha1(path: str | Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _snapshot_paths(snapshot_dir: str | Path, name: str) -> tuple[Path, Path]:
+    safe = re.sub(r"[^\w\-]+", "_", name)
+    return Path(snapshot_dir) / f"{safe}.pkl", Path(snapshot_dir) / f"{safe}.json"
+
+
+def _write_json(path: Path, data: dict) -> None:
+    # Erst temporär schreiben, dann atomar ersetzen (keine halbe Datei bei Abbruch)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _write_snapshot(data_path: Path, meta_path: Path, df: pd.DataFrame, meta: dict) -> None:
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = data_path.with_name(data_path.name + ".tmp")
+    df.to_pickle(tmp)
+    os.replace(tmp, data_path)
+    _write_json(meta_path, meta)
+
+
+def load_cached(
+    excel_path: str | Path, snapshot_dir: str | Path, name: str,
+    reader: Callable[[], pd.DataFrame], verbose: bool = True,
+) -> pd.DataFrame:
+    """Liefert die Tabelle `name` aus dem Snapshot oder liest sie mit reader() neu ein."""
+
+    data_path, meta_path = _snapshot_paths(snapshot_dir, name)
+    st = os.stat(excel_path)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        meta = None
+
+    if meta and meta.get("version") == SNAPSHOT_VERSION and data_path.is_file():
+        same_stat = meta.get("size") == st.st_size and meta.get("mtime_ns") == st.st_mtime_ns
+        same_hash = (
+            not same_stat
+            and meta.get("size") == st.st_size
+            and meta.get("sha1") == file_sha1(excel_path)
+        )
+        if same_stat or same_hash:
+            try:
+                df = pd.read_pickle(data_path)
+                if same_hash:
+                    meta["mtime_ns"] = st.st_mtime_ns
+                    _write_json(meta_path, meta)
+                if verbose:
+                    print(f"[INFO] Snapshot verwendet für '{name}'")
+                return df
+            except Exception as e:
+                print(f"[WARN] Snapshot für '{name}' unlesbar, lese Excel neu: {e}")
+
+    df = reader()
+    try:
+        _write_snapshot(data_path, meta_path, df, {
+            "version": SNAPSHOT_VERSION,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha1": file_sha1(excel_path),
+        })
+    except Exception as e:
+        print(f"[WARN] Snapshot konnte nicht geschrieben werden: {e}")
+    return df